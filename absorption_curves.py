@@ -0,0 +1,250 @@
+#%%
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from financial_statement_parser import file_content_hash
+from quarterly_panel import DEFAULT_MOC_PATH, load_moc_quarterly
+
+SEGMENTS = ('apartment', 'individual_house', 'land_plot')
+# MoC publishes national series only; region is kept as a lookup key for regional sources
+DEFAULT_REGION = 'national'
+
+# MoC indicators (see quarterly_panel.load_moc_quarterly)
+APARTMENT_HOUSE_TRANSACTIONS = 'transaction_volume:Lượng giao dịch căn hộ chung cư nhà ở riêng lẻ'
+LAND_TRANSACTIONS = 'transaction_volume:Lượng giao dịch đất nền'
+SEGMENT_INVENTORY = {
+    'apartment': 'inventory:Chung cư',
+    'individual_house': 'inventory:Nhà ở riêng lẻ',
+    'land_plot': 'inventory:Đất nền',
+}
+
+# Share of remaining stock a project sells per year in an average market
+DEFAULT_BASE_ANNUAL_RATES = {
+    'apartment': 0.45,
+    'individual_house': 0.35,
+    'land_plot': 0.40,
+}
+MIN_ANNUAL_RATE = 0.05
+MAX_ANNUAL_RATE = 0.95
+
+# Number of sales years covered by each precomputed curve
+DEFAULT_HORIZON = 10
+# Extra start years past the last MoC year, which use the long-run absorption rate
+FUTURE_START_YEARS = 15
+
+# Lookup tables keyed by (MoC file hash, horizon)
+_ABSORPTION_CACHE: Dict[tuple, pd.DataFrame] = {}
+# MoC file hashes keyed by path, recomputed only when the file's mtime changes
+_MOC_HASH_CACHE: Dict[str, Tuple[float, str]] = {}
+
+
+def quarterly_absorption_index(moc: pd.DataFrame) -> pd.DataFrame:
+    """
+    Quarterly market pace by segment: transactions relative to inventory.
+
+    MoC reports apartment and individual house transactions as one series; it is split
+    between the two segments in proportion to their inventories.
+
+    Args:
+        moc: Indicator x quarter table from load_moc_quarterly
+
+    Returns:
+        DataFrame of segments x quarters (NaN where either series is missing)
+    """
+    apartment_inventory = moc.loc[SEGMENT_INVENTORY['apartment']].to_numpy(dtype=float)
+    house_inventory = moc.loc[SEGMENT_INVENTORY['individual_house']].to_numpy(dtype=float)
+    land_inventory = moc.loc[SEGMENT_INVENTORY['land_plot']].to_numpy(dtype=float)
+    combined_transactions = moc.loc[APARTMENT_HOUSE_TRANSACTIONS].to_numpy(dtype=float)
+    land_transactions = moc.loc[LAND_TRANSACTIONS].to_numpy(dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        apartment_share = apartment_inventory / (apartment_inventory + house_inventory)
+        transactions = np.vstack([
+            combined_transactions * apartment_share,
+            combined_transactions * (1.0 - apartment_share),
+            land_transactions,
+        ])
+        inventory = np.vstack([apartment_inventory, house_inventory, land_inventory])
+        ratio = np.where(inventory > 0, transactions / inventory, np.nan)
+
+    return pd.DataFrame(ratio, index=list(SEGMENTS), columns=moc.columns)
+
+
+def annual_absorption_rates(
+    quarterly_index: pd.DataFrame,
+    base_rates: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """
+    Annual project absorption rates by segment and calendar year.
+
+    MoC inventory counts unsold completed stock, which is small next to quarterly
+    transactions, so the raw ratio is not a project sell-through rate. Instead each
+    year's mean transactions-to-inventory ratio, relative to the segment's long-run
+    mean, scales the segment's base annual rate: a hot market sells faster than
+    usual, a slow one slower.
+
+    Args:
+        quarterly_index: Output of quarterly_absorption_index
+        base_rates: {segment: share of remaining stock sold per year in an average market}
+
+    Returns:
+        DataFrame of segments x calendar years with rates in [MIN_ANNUAL_RATE, MAX_ANNUAL_RATE]
+    """
+    base_rates = {**DEFAULT_BASE_ANNUAL_RATES, **(base_rates or {})}
+    years = np.array([period.year for period in quarterly_index.columns])
+    annual_index = pd.DataFrame({
+        int(year): quarterly_index.loc[:, years == year].mean(axis=1, skipna=True)
+        for year in np.unique(years)
+    })
+    relative = annual_index.div(annual_index.mean(axis=1, skipna=True), axis=0)
+    base = pd.Series(base_rates).reindex(relative.index)
+    return relative.mul(base, axis=0).clip(MIN_ANNUAL_RATE, MAX_ANNUAL_RATE)
+
+
+def _sales_shares(annual_rates: np.ndarray) -> np.ndarray:
+    """
+    Convert per-year absorption rates (..., horizon) into shares of total sales.
+
+    Each year sells its rate times the remaining stock; the last year takes whatever
+    is left so every curve sums to 1.
+    """
+    remaining = np.cumprod(1.0 - annual_rates, axis=-1)
+    remaining_before = np.concatenate([np.ones_like(remaining[..., :1]), remaining[..., :-1]], axis=-1)
+    shares = annual_rates * remaining_before
+    shares[..., -1] = remaining_before[..., -1]
+    return shares
+
+
+def build_absorption_table(
+    moc: Optional[pd.DataFrame] = None,
+    horizon: int = DEFAULT_HORIZON,
+    region: str = DEFAULT_REGION,
+    base_rates: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """
+    Precompute presales absorption curves for every segment and sales start year.
+
+    Calendar years with MoC data use that year's absorption rate; other years fall
+    back to the segment's base rate.
+
+    Args:
+        moc: Indicator x quarter table (defaults to load_moc_quarterly())
+        horizon: Number of sales years per curve
+        region: Region label for the rows
+        base_rates: Overrides for DEFAULT_BASE_ANNUAL_RATES
+
+    Returns:
+        DataFrame indexed by (segment, region, start_year) with columns 0..horizon-1
+        holding the share of total presales sold in each year since start
+    """
+    if moc is None:
+        moc = load_moc_quarterly()
+
+    base_rates = {**DEFAULT_BASE_ANNUAL_RATES, **(base_rates or {})}
+    annual = annual_absorption_rates(quarterly_absorption_index(moc), base_rates)
+    long_run = pd.Series(base_rates).reindex(annual.index)
+
+    first_year = int(annual.columns.min())
+    last_year = int(annual.columns.max()) + FUTURE_START_YEARS
+    calendar_years = np.arange(first_year, last_year + horizon)
+    rates = annual.reindex(columns=calendar_years)
+    rates = rates.apply(lambda column: column.fillna(long_run)).to_numpy(dtype=float)  # (segments, calendar years)
+
+    start_years = np.arange(first_year, last_year + 1)
+    # Sliding windows: rates for start year s cover calendar years s .. s + horizon - 1
+    windows = np.lib.stride_tricks.sliding_window_view(rates, horizon, axis=1)[:, :len(start_years)]
+    shares = _sales_shares(windows)  # (segments, start years, horizon)
+
+    index = pd.MultiIndex.from_product(
+        [list(annual.index), [region], start_years], names=['segment', 'region', 'start_year']
+    )
+    return pd.DataFrame(shares.reshape(-1, horizon), index=index, columns=list(range(horizon)))
+
+
+def get_absorption_table(
+    moc_path: str = DEFAULT_MOC_PATH,
+    horizon: int = DEFAULT_HORIZON
+) -> pd.DataFrame:
+    """
+    Cached absorption table, rebuilt only when the MoC file content changes.
+
+    Lookups only stat the file; it is re-hashed when its mtime changes, so repeated
+    calls across many projects do not re-read MoC_Data.csv.
+    """
+    mtime = os.path.getmtime(moc_path)
+    cached = _MOC_HASH_CACHE.get(moc_path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, file_content_hash(moc_path))
+        _MOC_HASH_CACHE[moc_path] = cached
+    key = (cached[1], horizon)
+    if key not in _ABSORPTION_CACHE:
+        _ABSORPTION_CACHE[key] = build_absorption_table(load_moc_quarterly(moc_path), horizon=horizon)
+    return _ABSORPTION_CACHE[key]
+
+
+def clear_absorption_cache() -> None:
+    """Drop all cached absorption tables."""
+    _ABSORPTION_CACHE.clear()
+    _MOC_HASH_CACHE.clear()
+
+
+def get_presales_distribution(
+    segment: str,
+    sales_start_year: int,
+    sales_end_year: int,
+    region: str = DEFAULT_REGION,
+    table: Optional[pd.DataFrame] = None
+) -> Dict[str, float]:
+    """
+    Default presales distribution for a project, from the absorption lookup table.
+
+    Args:
+        segment: 'apartment', 'individual_house' or 'land_plot'
+        sales_start_year: Year sales/presales begin
+        sales_end_year: Year sales/presales end
+        region: Region key (MoC data is national)
+        table: Lookup table (defaults to get_absorption_table())
+
+    Returns:
+        {year_str: percentage} summing to 100, in the format expected by
+        generate_simplified_balance_sheet_schedules' presales_distribution
+    """
+    if segment not in SEGMENTS:
+        raise ValueError(f"Unknown segment '{segment}'. Expected one of {SEGMENTS}")
+
+    table = get_absorption_table() if table is None else table
+    regions = list(table.index.unique(level='region'))
+    if region not in regions:
+        raise ValueError(f"Unknown region '{region}'. Expected one of {regions}")
+
+    n_years = sales_end_year - sales_start_year + 1
+    if n_years <= 0:
+        return {}
+
+    start_years = table.loc[(segment, region)].index
+    start_year = int(np.clip(sales_start_year, start_years.min(), start_years.max()))
+    curve = table.loc[(segment, region, start_year)].to_numpy(dtype=float)
+
+    if n_years <= len(curve):
+        shares = curve[:n_years].copy()
+        # Stock left after the sales window is sold in its final year
+        shares[-1] += curve[n_years:].sum()
+    else:
+        shares = np.concatenate([curve, np.zeros(n_years - len(curve))])
+
+    return {str(sales_start_year + k): float(share * 100.0) for k, share in enumerate(shares)}
+
+
+# Example usage
+if __name__ == "__main__":
+    table = get_absorption_table()
+    print(f"Absorption table: {len(table)} curves")
+    print(annual_absorption_rates(quarterly_absorption_index(load_moc_quarterly())).round(3))
+
+    for segment in SEGMENTS:
+        print(f"\n{segment} presales 2025-2028:", {
+            year: round(pct, 1) for year, pct in get_presales_distribution(segment, 2025, 2028).items()
+        })
@@ -1,7 +1,325 @@
 #%%
+import inspect
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
+
+# Balance (stock) columns: the summary row shows the final balance instead of a sum
+BALANCE_COLUMNS = ('Debt_Balance', 'Inventory_Balance', 'Customer_Prepayment_Balance', 'Cumulative_Cash_Balance')
+
+
+def _build_schedule_dataframe(years: List[int], schedules: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Assemble schedule arrays into the output DataFrame with a 'Total' summary row.
+    
+    Args:
+        years: Timeline years
+        schedules: {column: array} in output order
+    
+    Returns:
+        DataFrame with a 'Year' column, one row per year and a final 'Total' row
+    """
+    df = pd.DataFrame({'Year': years, **schedules})
+    
+    # Add summary row: final balance for stock columns, sum for flow columns
+    summary = pd.DataFrame({
+        'Year': ['Total'],
+        **{
+            column: [values[-1] if column in BALANCE_COLUMNS else values.sum()]
+            for column, values in schedules.items()
+        }
+    })
+    
+    return pd.concat([df, summary], ignore_index=True)
+
+
+def _interest_rate_by_year(interest_rate: Union[float, Dict[int, float], List[float], np.ndarray], years: List[int]) -> np.ndarray:
+    """
+    Expand an interest rate input to one rate per timeline year.
+    
+    Args:
+        interest_rate: A flat rate, a {year: rate} curve, or a sequence aligned to `years`.
+            Curve years that are not listed carry the most recent earlier rate forward
+            (the first listed rate applies before it).
+        years: Project timeline
+    
+    Returns:
+        Array of annual rates, shape (len(years),)
+    """
+    if isinstance(interest_rate, dict):
+        if not interest_rate:
+            return np.zeros(len(years))
+        curve_years = np.array(sorted(interest_rate))
+        curve_rates = np.array([interest_rate[year] for year in curve_years], dtype=float)
+        positions = np.searchsorted(curve_years, np.asarray(years), side='right') - 1
+        return curve_rates[np.clip(positions, 0, None)]
+    
+    rates = np.asarray(interest_rate, dtype=float)
+    if rates.ndim == 0:
+        return np.full(len(years), float(rates))
+    if rates.shape != (len(years),):
+        raise ValueError(f"Interest rate vector has {rates.shape[0]} entries for {len(years)} timeline years")
+    return rates
+
+
+def _resolve_timeline(
+    presales_schedule: Optional[Dict[int, float]],
+    debt_disbursement_start_year: int,
+    debt_disbursement_end_year: int,
+    debt_repayment_start_year: int,
+    debt_repayment_end_year: int,
+    revenue_booking_start_year: int,
+    revenue_booking_end_year: int,
+    project_start_year: Optional[int] = None,
+    project_end_year: Optional[int] = None,
+    land_payment_year: Optional[int] = None,
+    land_payment_start_year: Optional[int] = None,
+    land_payment_years: int = 1
+) -> Tuple[int, int, int, int]:
+    """
+    Resolve the project timeline and land payment window shared by the schedule generators.
+    
+    Returns:
+        Tuple of (project_start_year, project_end_year, land_payment_start_year, land_payment_years)
+    """
+    
+    # Handle backwards compatibility for land payment
+    if land_payment_start_year is None and land_payment_year is not None:
+        # Use old single-year parameter
+        land_payment_start_year = land_payment_year
+        land_payment_years = 1
+    elif land_payment_start_year is None:
+        # Default to project start if not specified
+        land_payment_start_year = project_start_year or debt_disbursement_start_year
+        land_payment_years = 1
+    
+    # Determine project timeline
+    if project_start_year is None:
+        # Include all relevant start years in the timeline calculation
+        start_years = []
+        
+        # Add all years that have activities
+        start_years.append(debt_disbursement_start_year)
+        start_years.append(land_payment_start_year)
+        start_years.append(revenue_booking_start_year)
+        start_years.append(debt_repayment_start_year)
+        
+        if presales_schedule:
+            start_years.append(min(presales_schedule.keys()))
+        
+        # Filter out None values and get minimum
+        start_years = [y for y in start_years if y is not None]
+        project_start_year = min(start_years) if start_years else debt_disbursement_start_year
+    
+    if project_end_year is None:
+        # Include all relevant end years
+        end_years = []
+        
+        end_years.append(debt_disbursement_end_year)
+        end_years.append(debt_repayment_end_year)
+        end_years.append(revenue_booking_end_year)
+        
+        if presales_schedule:
+            end_years.append(max(presales_schedule.keys()))
+        
+        # Filter out None values and get maximum
+        end_years = [y for y in end_years if y is not None]
+        project_end_year = max(end_years) if end_years else revenue_booking_end_year
+    
+    return project_start_year, project_end_year, land_payment_start_year, land_payment_years
+
+
+def _timeline_from_kwargs(kwargs: Dict) -> Tuple[int, int, int, int]:
+    """
+    Resolve the timeline from keyword arguments of generate_balance_sheet_schedules.
+    
+    Returns:
+        Tuple of (project_start_year, project_end_year, land_payment_start_year, land_payment_years)
+    """
+    return _resolve_timeline(
+        presales_schedule=kwargs.get('presales_schedule') or {},
+        debt_disbursement_start_year=kwargs.get('debt_disbursement_start_year'),
+        debt_disbursement_end_year=kwargs.get('debt_disbursement_end_year'),
+        debt_repayment_start_year=kwargs.get('debt_repayment_start_year'),
+        debt_repayment_end_year=kwargs.get('debt_repayment_end_year'),
+        revenue_booking_start_year=kwargs.get('revenue_booking_start_year'),
+        revenue_booking_end_year=kwargs.get('revenue_booking_end_year'),
+        project_start_year=kwargs.get('project_start_year'),
+        project_end_year=kwargs.get('project_end_year'),
+        land_payment_year=kwargs.get('land_payment_year'),
+        land_payment_start_year=kwargs.get('land_payment_start_year'),
+        land_payment_years=kwargs.get('land_payment_years', 1)
+    )
+
+
+def _window_slice(project_start_year: int, n_years: int, start_year: int, end_year: int) -> slice:
+    """Timeline offsets of the years in [start_year, end_year], clipped to the project timeline."""
+    first = max(start_year - project_start_year, 0)
+    last = min(end_year - project_start_year, n_years - 1)
+    return slice(first, max(last + 1, first))
+
+
+def _window_schedule(
+    project_start_year: int,
+    n_years: int,
+    start_year: int,
+    end_year: int,
+    total: Union[float, np.ndarray]
+) -> np.ndarray:
+    """
+    Spread `total` evenly over [start_year, end_year], clipped to the project timeline.
+    
+    The per-year amount is based on the full window length, so years falling outside
+    the timeline are dropped rather than redistributed (same as the loop version).
+    A (B,) array of totals gives a (B, n_years) schedule.
+    """
+    total = np.asarray(total, dtype=float)
+    schedule = np.zeros(total.shape + (n_years,))
+    window_years = end_year - start_year + 1
+    if window_years > 0:
+        schedule[..., _window_slice(project_start_year, n_years, start_year, end_year)] = (
+            total[..., np.newaxis] / window_years
+        )
+    return schedule
+
+
+def _collection_matrix(
+    years: List[int],
+    presales_schedule: Dict[int, float],
+    cash_collection_schedules: Optional[Dict[int, Dict[int, float]]],
+    construction_end_year: int,
+    first_tranche_percentage: Union[float, np.ndarray] = 0.3
+) -> np.ndarray:
+    """
+    Build the presales collection matrix M, where M[..., i, j] is the share of presales
+    booked in years[i] that is collected as cash in years[j].
+    
+    With user-defined schedules the matrix is fixed. Otherwise the default tranche logic
+    applies: `first_tranche_percentage` in the presale year and the rest spread evenly to
+    construction end (100% immediately for presales at or after construction end). A
+    batched `first_tranche_percentage` of shape (B,) gives a (B, n, n) matrix.
+    """
+    n_years = len(years)
+    start_year = years[0]
+    
+    if cash_collection_schedules:
+        matrix = np.zeros((n_years, n_years))
+        for presale_year in presales_schedule:
+            if not start_year <= presale_year < start_year + n_years:
+                continue
+            i = presale_year - start_year
+            collection_schedule = cash_collection_schedules.get(presale_year, {})
+            if collection_schedule:
+                for collection_year, percentage in collection_schedule.items():
+                    if start_year <= collection_year < start_year + n_years:
+                        matrix[i, collection_year - start_year] += percentage / 100.0
+            else:
+                # Fallback: collect 100% in presale year if no schedule defined
+                matrix[i, i] += 1.0
+        return matrix
+    
+    immediate = np.zeros((n_years, n_years))
+    deferred = np.zeros((n_years, n_years))
+    for i, year in enumerate(years):
+        if year >= construction_end_year:
+            immediate[i, i] = 1.0
+            deferred[i, i] = 1.0
+        else:
+            immediate[i, i] = 1.0
+            annual_share = 1.0 / (construction_end_year - year)
+            last = min(construction_end_year - start_year, n_years - 1)
+            deferred[i, i + 1:last + 1] = annual_share
+    
+    first_tranche = np.asarray(first_tranche_percentage, dtype=float)[..., np.newaxis, np.newaxis]
+    return first_tranche * immediate + (1.0 - first_tranche) * deferred
+
+
+def _simplified_schedule_kwargs(params: Dict) -> Dict:
+    """
+    Translate generate_simplified_balance_sheet_schedules arguments into
+    generate_balance_sheet_schedules arguments.
+    
+    Args:
+        params: Complete {argument: value} mapping of generate_simplified_balance_sheet_schedules
+    
+    Returns:
+        Keyword arguments for generate_balance_sheet_schedules
+    """
+    
+    total_revenue = params['total_revenue']
+    sales_start_year = params['sales_start_year']
+    sales_end_year = params['sales_end_year']
+    presales_distribution = params['presales_distribution']
+    revenue_distribution = params['revenue_distribution']
+    price_increment_factor = params['price_increment_factor']
+    base_asp = params['base_asp']
+    total_nsa = params['total_nsa']
+    
+    # Default presales distribution from the precomputed market absorption curves
+    if not presales_distribution and params['presales_segment'] is not None:
+        from absorption_curves import get_presales_distribution
+        presales_distribution = get_presales_distribution(
+            params['presales_segment'], sales_start_year, sales_end_year, region=params['presales_region']
+        )
+    
+    # Generate presales schedule based on distribution with price increment
+    presales_schedule = {}
+    
+    # If price increment is provided and we have base ASP and NSA, calculate adjusted presales
+    if price_increment_factor > 0 and base_asp is not None and total_nsa is not None:
+        # Calculate presales with price increment for each year
+        sales_years_list = list(range(sales_start_year, sales_end_year + 1))
+        
+        if presales_distribution:
+            for i, year in enumerate(sales_years_list):
+                year_pct = presales_distribution.get(str(year), 0.0) / 100.0
+                year_nsa = total_nsa * year_pct
+                # Apply price increment: first year = base, subsequent years apply increment
+                year_asp = base_asp * (1 + price_increment_factor) ** i
+                presales_schedule[year] = year_nsa * year_asp
+        else:
+            # No fallback - require presales distribution
+            pass  # presales_schedule remains empty
+    else:
+        # Fallback to original logic if no price increment
+        if presales_distribution:
+            for year in range(sales_start_year, sales_end_year + 1):
+                year_pct = presales_distribution.get(str(year), 0.0) / 100.0
+                presales_schedule[year] = total_revenue * year_pct
+        else:
+            # No fallback - require presales distribution
+            pass  # presales_schedule remains empty
+    
+    # Convert revenue distribution from percentage strings to year integers with decimal values
+    revenue_dist_converted = None
+    if revenue_distribution:
+        revenue_dist_converted = {}
+        for year_str, percentage in revenue_distribution.items():
+            year = int(year_str)
+            # Convert percentage to decimal (e.g., 50% -> 0.5)
+            revenue_dist_converted[year] = percentage / 100.0
+    
+    # Use construction period for debt disbursement
+    return dict(
+        total_debt=params['total_debt'],
+        total_construction_cost=params['total_construction_cost'],
+        total_land_cost=params['total_land_cost'],
+        land_payment_year=params['land_payment_year'],  # Keep for backwards compatibility
+        land_payment_start_year=params['land_payment_start_year'],
+        land_payment_years=params['land_payment_years'],
+        presales_schedule=presales_schedule,
+        interest_rate=params['interest_rate'],
+        sga_percentage=params['sga_percentage'],
+        debt_disbursement_start_year=params['construction_start_year'],
+        debt_disbursement_end_year=params['construction_end_year'],
+        debt_repayment_start_year=params['debt_repayment_start_year'],
+        debt_repayment_end_year=params['debt_repayment_end_year'],
+        revenue_booking_start_year=params['revenue_booking_start_year'],
+        revenue_booking_end_year=params['revenue_booking_end_year'],
+        revenue_distribution=revenue_dist_converted,
+        tax_rate=params['tax_rate']
+    )
+
 
 def generate_balance_sheet_schedules(
     total_debt: float,
@@ -9,7 +327,7 @@ def generate_balance_sheet_schedules(
     total_land_cost: float,  # New parameter
     land_payment_year: int = None,  # Deprecated - kept for backwards compatibility
     presales_schedule: Dict[int, float] = None,  # {year: presale_amount}
-    interest_rate: float = 0.0,
+    interest_rate: Union[float, Dict[int, float], List[float]] = 0.0,  # Flat rate or {year: rate} curve
     sga_percentage: float = 0.0,  # SG&A as percentage of revenue (e.g., 0.05 for 5%)
     debt_disbursement_start_year: int = None,
     debt_disbursement_end_year: int = None,
@@ -36,7 +354,8 @@ def generate_balance_sheet_schedules(
         land_payment_start_year: Start year for land payment (for multi-year payment)
         land_payment_years: Number of years over which land payment is distributed
         presales_schedule: Dictionary of presales by year {year: amount}
-        interest_rate: Annual interest rate (as decimal, e.g., 0.08 for 8%)
+        interest_rate: Annual interest rate (as decimal, e.g., 0.08 for 8%), or a per-year
+            curve as {year: rate} or a list aligned to the project timeline
         sga_percentage: SG&A as percentage of revenue (as decimal, e.g., 0.05 for 5%)
         debt_disbursement_start_year: Year debt disbursement begins
         debt_disbursement_end_year: Year debt disbursement ends
@@ -68,53 +387,31 @@ def generate_balance_sheet_schedules(
         - Cash_Balance_Change: Net cash flow for the year
     """
     
-    # Handle backwards compatibility for land payment
-    if land_payment_start_year is None and land_payment_year is not None:
-        # Use old single-year parameter
-        land_payment_start_year = land_payment_year
-        land_payment_years = 1
-    elif land_payment_start_year is None:
-        # Default to project start if not specified
-        land_payment_start_year = project_start_year or debt_disbursement_start_year
-        land_payment_years = 1
-    
-    # Determine project timeline
-    if project_start_year is None:
-        # Include all relevant start years in the timeline calculation
-        start_years = []
-        
-        # Add all years that have activities
-        start_years.append(debt_disbursement_start_year)
-        start_years.append(land_payment_start_year)
-        start_years.append(revenue_booking_start_year)
-        start_years.append(debt_repayment_start_year)
-        
-        if presales_schedule:
-            start_years.append(min(presales_schedule.keys()))
-        
-        # Filter out None values and get minimum
-        start_years = [y for y in start_years if y is not None]
-        project_start_year = min(start_years) if start_years else debt_disbursement_start_year
-    
-    if project_end_year is None:
-        # Include all relevant end years
-        end_years = []
-        
-        end_years.append(debt_disbursement_end_year)
-        end_years.append(debt_repayment_end_year)
-        end_years.append(revenue_booking_end_year)
-        
-        if presales_schedule:
-            end_years.append(max(presales_schedule.keys()))
-        
-        # Filter out None values and get maximum
-        end_years = [y for y in end_years if y is not None]
-        project_end_year = max(end_years) if end_years else revenue_booking_end_year
+    project_start_year, project_end_year, land_payment_start_year, land_payment_years = _resolve_timeline(
+        presales_schedule=presales_schedule,
+        debt_disbursement_start_year=debt_disbursement_start_year,
+        debt_disbursement_end_year=debt_disbursement_end_year,
+        debt_repayment_start_year=debt_repayment_start_year,
+        debt_repayment_end_year=debt_repayment_end_year,
+        revenue_booking_start_year=revenue_booking_start_year,
+        revenue_booking_end_year=revenue_booking_end_year,
+        project_start_year=project_start_year,
+        project_end_year=project_end_year,
+        land_payment_year=land_payment_year,
+        land_payment_start_year=land_payment_start_year,
+        land_payment_years=land_payment_years
+    )
     
     # Initialize arrays for each schedule
+    # Years map to array positions by offset from the project start (year - project_start_year),
+    # so every window is filled as a slice and the whole build is linear in the horizon
     years = list(range(project_start_year, project_end_year + 1))
     n_years = len(years)
     
+    def year_offset(year: int) -> Optional[int]:
+        offset = year - project_start_year
+        return offset if 0 <= offset < n_years else None
+    
     # Initialize all schedules
     debt_disbursement = np.zeros(n_years)
     debt_repayment = np.zeros(n_years)
@@ -140,66 +437,60 @@ def generate_balance_sheet_schedules(
     disbursement_years = debt_disbursement_end_year - debt_disbursement_start_year + 1
     if disbursement_years > 0:
         annual_disbursement = total_debt / disbursement_years
-        for year in range(debt_disbursement_start_year, debt_disbursement_end_year + 1):
-            if year in years:
-                idx = years.index(year)
-                debt_disbursement[idx] = annual_disbursement
+        window = _window_slice(project_start_year, n_years, debt_disbursement_start_year, debt_disbursement_end_year)
+        debt_disbursement[window] = annual_disbursement
     
     # 2. Calculate construction cost schedule (linear during construction period)
     # Assuming construction period aligns with debt disbursement period
     construction_years = debt_disbursement_end_year - debt_disbursement_start_year + 1
     if construction_years > 0:
         annual_construction = total_construction_cost / construction_years
-        for year in range(debt_disbursement_start_year, debt_disbursement_end_year + 1):
-            if year in years:
-                idx = years.index(year)
-                construction_cost[idx] = annual_construction
-                cash_outflow_construction[idx] = -annual_construction  # Negative for outflow
+        window = _window_slice(project_start_year, n_years, debt_disbursement_start_year, debt_disbursement_end_year)
+        construction_cost[window] = annual_construction
+        cash_outflow_construction[window] = -annual_construction  # Negative for outflow
     
     # 3. Calculate debt repayment schedule (linear during repayment period)
     repayment_years = debt_repayment_end_year - debt_repayment_start_year + 1
     if repayment_years > 0:
         annual_repayment = total_debt / repayment_years
-        for year in range(debt_repayment_start_year, debt_repayment_end_year + 1):
-            if year in years:
-                idx = years.index(year)
-                debt_repayment[idx] = -annual_repayment  # Negative for outflow
+        window = _window_slice(project_start_year, n_years, debt_repayment_start_year, debt_repayment_end_year)
+        debt_repayment[window] = -annual_repayment  # Negative for outflow
     
     # 4. Calculate presales and convert to cash inflow schedule with tranche logic
     # First record the presales bookings (contractual commitments)
     # Note: presales[i] = booking amount (when sale is made)
     #       cash_inflow_presales[i] = actual cash collection (follows tranche payment schedule)
     for year, amount in presales_schedule.items():
-        if year in years:
-            idx = years.index(year)
+        idx = year_offset(year)
+        if idx is not None:
             presales[idx] = amount  # Record presales booking (contractual amount)
     
     # Calculate actual cash collection from presales using flexible schedules
     if cash_collection_schedules:
         # Use user-defined collection schedules
         for presale_year, presale_amount in presales_schedule.items():
-            if presale_year in years and presale_amount > 0:
+            presale_year_idx = year_offset(presale_year)
+            if presale_year_idx is not None and presale_amount > 0:
                 # Get the collection schedule for this presale year
                 collection_schedule = cash_collection_schedules.get(presale_year, {})
                 
                 if collection_schedule:
                     # Apply the user-defined percentages
                     for collection_year, percentage in collection_schedule.items():
-                        if collection_year in years:
-                            col_idx = years.index(collection_year)
+                        col_idx = year_offset(collection_year)
+                        if col_idx is not None:
                             collection_amount = presale_amount * (percentage / 100.0)
                             cash_inflow_presales[col_idx] += collection_amount
                 else:
                     # Fallback: collect 100% in presale year if no schedule defined
-                    presale_year_idx = years.index(presale_year)
                     cash_inflow_presales[presale_year_idx] += presale_amount
     else:
         # Fallback to default 30/70 logic if no schedules provided
         construction_end_year = debt_disbursement_end_year
         
         for year, presale_amount in presales_schedule.items():
-            if year in years and presale_amount > 0:
-                presale_year_idx = years.index(year)
+            presale_year_idx = year_offset(year)
+            if presale_year_idx is not None and presale_amount > 0:
                 
                 # Default: 30% in first year, 70% spread to construction end
                 if year >= construction_end_year:
@@ -212,60 +503,55 @@ def generate_balance_sheet_schedules(
                     
                     # Remaining 70% distributed evenly
                     remaining_amount = presale_amount * 0.7
-                    collection_years = list(range(year + 1, construction_end_year + 1))
+                    n_collection_years = construction_end_year - year
                     
-                    if collection_years:
-                        annual_collection = remaining_amount / len(collection_years)
-                        for col_year in collection_years:
-                            if col_year in years:
-                                col_idx = years.index(col_year)
-                                cash_inflow_presales[col_idx] += annual_collection
+                    if n_collection_years > 0:
+                        annual_collection = remaining_amount / n_collection_years
+                        window = _window_slice(project_start_year, n_years, year + 1, construction_end_year)
+                        cash_inflow_presales[window] += annual_collection
                     else:
                         # Add remaining to presale year
                         cash_inflow_presales[presale_year_idx] += remaining_amount
     
     # 5. Calculate SG&A expense based on actual cash collection
     # SG&A is now calculated as a percentage of actual cash collected, not presales booking
-    for i, year in enumerate(years):
-        if cash_inflow_presales[i] > 0:
-            # SG&A expense is based on cash collected in this year
-            sga_amount = cash_inflow_presales[i] * sga_percentage
-            sga_expense[i] = sga_amount  # Hit P&L when cash is collected
-            cash_outflow_sga[i] = -sga_amount  # Negative for cash outflow
+    collecting = cash_inflow_presales > 0
+    # SG&A expense is based on cash collected in this year and hits P&L when cash is collected
+    sga_expense[collecting] = cash_inflow_presales[collecting] * sga_percentage
+    cash_outflow_sga[collecting] = -sga_expense[collecting]  # Negative for cash outflow
     
     # 6. Calculate land cost payment (multi-year payment)
     if total_land_cost > 0 and land_payment_start_year is not None:
         land_payment_end_year = land_payment_start_year + land_payment_years - 1
         annual_land_payment = total_land_cost / land_payment_years
         
-        for payment_year in range(land_payment_start_year, land_payment_end_year + 1):
-            if payment_year in years:
-                idx = years.index(payment_year)
-                land_cost[idx] = annual_land_payment
-                cash_outflow_land[idx] = -annual_land_payment  # Negative for cash outflow
+        window = _window_slice(project_start_year, n_years, land_payment_start_year, land_payment_end_year)
+        land_cost[window] = annual_land_payment
+        cash_outflow_land[window] = -annual_land_payment  # Negative for cash outflow
     
     # 7. Calculate revenue recognition (custom distribution or linear)
     total_revenue = sum(presales_schedule.values()) if presales_schedule else 0
     
     if revenue_distribution and isinstance(revenue_distribution, dict):
         # Use custom revenue distribution
-        for year in range(revenue_booking_start_year, revenue_booking_end_year + 1):
-            if year in years:
-                idx = years.index(year)
-                # Get percentage for this year (as decimal)
-                year_pct = revenue_distribution.get(year, 0.0)
-                revenue_recognition[idx] = total_revenue * year_pct
+        window = _window_slice(project_start_year, n_years, revenue_booking_start_year, revenue_booking_end_year)
+        for idx in range(window.start, window.stop):
+            # Get percentage for this year (as decimal)
+            year_pct = revenue_distribution.get(years[idx], 0.0)
+            revenue_recognition[idx] = total_revenue * year_pct
     else:
         # Default: linear distribution during booking period
         booking_years = revenue_booking_end_year - revenue_booking_start_year + 1
         if booking_years > 0 and total_revenue > 0:
             annual_revenue = total_revenue / booking_years
-            for year in range(revenue_booking_start_year, revenue_booking_end_year + 1):
-                if year in years:
-                    idx = years.index(year)
-                    revenue_recognition[idx] = annual_revenue
+            window = _window_slice(project_start_year, n_years, revenue_booking_start_year, revenue_booking_end_year)
+            revenue_recognition[window] = annual_revenue
     
     # 8. Calculate debt balance, interest, and inventory year by year
+    annual_interest_rates = _interest_rate_by_year(interest_rate, years)
+    revenue_booking_end_idx = revenue_booking_end_year - project_start_year
+    # Running total of capitalised interest, replacing a re-sum of the whole array every year
+    cumulative_interest_capitalized = 0.0
     for i, year in enumerate(years):
         # Starting debt balance
         if i == 0:
@@ -278,7 +564,7 @@ def generate_balance_sheet_schedules(
         
         # Calculate interest on average balance during the year
         average_balance = (starting_balance + debt_balance[i]) / 2
-        total_interest = average_balance * interest_rate
+        total_interest = average_balance * annual_interest_rates[i]
         
         # Determine if we're in construction or revenue period
         is_construction_period = year < revenue_booking_start_year
@@ -307,6 +593,8 @@ def generate_balance_sheet_schedules(
             interest_capitalized[i] = 0
             cash_outflow_interest[i] = 0
         
+        cumulative_interest_capitalized += interest_capitalized[i]
+        
         # Update inventory (include land, construction, and capitalized interest)
         inventory_addition[i] = construction_cost[i] + land_cost[i] + interest_capitalized[i]
         
@@ -321,17 +609,15 @@ def generate_balance_sheet_schedules(
             # Calculate COGS proportional to revenue recognition
             revenue_percentage = revenue_recognition[i] / total_revenue if total_revenue > 0 else 0
             
-            # Total inventory to be released = total construction cost + total capitalized interest
-            total_inventory_accumulated = sum(inventory_addition[:i+1]) + previous_inventory
-            
             # COGS released proportionally
-            if i == years.index(revenue_booking_end_year):
+            if i == revenue_booking_end_idx:
                 # Last year: release all remaining inventory
                 cogs[i] = previous_inventory + inventory_addition[i]
                 inventory_balance[i] = 0
             else:
                 # Release inventory proportional to revenue
-                total_expected_inventory = total_construction_cost + total_land_cost + sum(interest_capitalized)
+                # Total inventory to be released = land + construction cost + capitalized interest to date
+                total_expected_inventory = total_construction_cost + total_land_cost + cumulative_interest_capitalized
                 cogs[i] = total_expected_inventory * revenue_percentage
                 inventory_balance[i] = previous_inventory + inventory_addition[i] - cogs[i]
         else:
@@ -388,9 +674,7 @@ def generate_balance_sheet_schedules(
     # Calculate cumulative cash balance
     cumulative_cash_balance = np.cumsum(cash_balance_change)
     
-    # Create DataFrame with results in the requested order
-    df = pd.DataFrame({
-        'Year': years,
+    return _build_schedule_dataframe(years, {
         # Debt section
         'Debt_Balance': debt_balance,
         # Cost section
@@ -423,46 +707,6 @@ def generate_balance_sheet_schedules(
         'Cash_Balance_Change': cash_balance_change,
         'Cumulative_Cash_Balance': cumulative_cash_balance
     })
-    
-    # Add summary row
-    summary = pd.DataFrame({
-        'Year': ['Total'],
-        # Debt section
-        'Debt_Balance': [debt_balance[-1]],  # Final balance
-        # Cost section
-        'Land_Cost': [land_cost.sum()],
-        'Construction_Cost': [construction_cost.sum()],
-        'Interest_Capitalized': [interest_capitalized.sum()],
-        # Inventory section
-        'Inventory_Addition': [inventory_addition.sum()],
-        'Inventory_Balance': [inventory_balance[-1]],  # Final balance
-        # Presales and Revenue section
-        'Presales': [presales.sum()],
-        'Customer_Prepayment_Balance': [customer_prepayment_balance[-1]],  # Final balance
-        'Revenue_Recognition': [revenue_recognition.sum()],
-        # P&L section
-        'COGS': [cogs.sum()],
-        'SGA_Expense': [sga_expense.sum()],
-        'Interest_Expense_Cash': [interest_expense_cash.sum()],
-        'PBT': [pbt.sum()],
-        'Tax': [tax_expense.sum()],
-        'PAT': [pat.sum()],
-        # Cash flow section
-        'Cash_Inflow_Presales': [cash_inflow_presales.sum()],
-        'Debt_Disbursement': [debt_disbursement.sum()],
-        'Debt_Repayment': [debt_repayment.sum()],  # Already negative
-        'Cash_Outflow_Land': [cash_outflow_land.sum()],
-        'Cash_Outflow_Construction': [cash_outflow_construction.sum()],
-        'Cash_Outflow_Interest': [cash_outflow_interest.sum()],
-        'Cash_Outflow_SGA': [cash_outflow_sga.sum()],
-        'Cash_Outflow_Tax': [cash_outflow_tax.sum()],
-        'Cash_Balance_Change': [cash_balance_change.sum()],
-        'Cumulative_Cash_Balance': [cumulative_cash_balance[-1]]  # Final cash balance
-    })
-    
-    df = pd.concat([df, summary], ignore_index=True)
-    
-    return df
 
 
 def generate_simplified_balance_sheet_schedules(
@@ -471,7 +715,7 @@ def generate_simplified_balance_sheet_schedules(
     total_land_cost: float,
     land_payment_year: int = None,  # Deprecated - kept for backwards compatibility
     total_revenue: float = 0.0,
-    interest_rate: float = 0.0,
+    interest_rate: Union[float, Dict[int, float], List[float]] = 0.0,  # Flat rate or {year: rate} curve
     sga_percentage: float = 0.0,  # SG&A as percentage of revenue
     construction_start_year: int = None,
     construction_end_year: int = None,
@@ -488,7 +732,9 @@ def generate_simplified_balance_sheet_schedules(
     base_asp: float = None,  # Base average selling price
     total_nsa: float = None,  # Total net sellable area
     land_payment_start_year: int = None,  # New parameter for multi-year payment
-    land_payment_years: int = 1  # New parameter for payment duration
+    land_payment_years: int = 1,  # New parameter for payment duration
+    presales_segment: Optional[str] = None,  # 'apartment', 'individual_house' or 'land_plot'
+    presales_region: str = 'national'
 ) -> pd.DataFrame:
     """
     Simplified version that integrates with project pipeline calculations.
@@ -501,7 +747,7 @@ def generate_simplified_balance_sheet_schedules(
         land_payment_start_year: Start year for land payment (for multi-year payment)
         land_payment_years: Number of years over which land payment is distributed
         total_revenue: Total revenue from project
-        interest_rate: Annual interest rate (as decimal)
+        interest_rate: Annual interest rate (as decimal), or a {year: rate} curve
         sga_percentage: SG&A as percentage of revenue (as decimal)
         construction_start_year: Year construction begins
         construction_end_year: Year construction ends
@@ -513,68 +759,409 @@ def generate_simplified_balance_sheet_schedules(
         revenue_booking_end_year: Year revenue recognition ends
         presales_distribution: Optional custom distribution {year_str: percentage} for presales
         revenue_distribution: Optional custom distribution {year_str: percentage} for revenue recognition
+        presales_segment: If no presales_distribution is given, use the market absorption
+            curve for this segment (see absorption_curves.get_presales_distribution)
+        presales_region: Region key for the absorption curve lookup
     
     Returns:
         DataFrame with balance sheet schedules
     """
     
-    # Generate presales schedule based on distribution with price increment
-    presales_schedule = {}
-    
-    # If price increment is provided and we have base ASP and NSA, calculate adjusted presales
-    if price_increment_factor > 0 and base_asp is not None and total_nsa is not None:
-        # Calculate presales with price increment for each year
-        sales_years_list = list(range(sales_start_year, sales_end_year + 1))
-        
-        if presales_distribution:
-            for i, year in enumerate(sales_years_list):
-                year_pct = presales_distribution.get(str(year), 0.0) / 100.0
-                year_nsa = total_nsa * year_pct
-                # Apply price increment: first year = base, subsequent years apply increment
-                year_asp = base_asp * (1 + price_increment_factor) ** i
-                presales_schedule[year] = year_nsa * year_asp
-        else:
-            # No fallback - require presales distribution
-            pass  # presales_schedule remains empty
-    else:
-        # Fallback to original logic if no price increment
-        if presales_distribution:
-            for year in range(sales_start_year, sales_end_year + 1):
-                year_pct = presales_distribution.get(str(year), 0.0) / 100.0
-                presales_schedule[year] = total_revenue * year_pct
-        else:
-            # No fallback - require presales distribution
-            pass  # presales_schedule remains empty
-    
-    # Convert revenue distribution from percentage strings to year integers with decimal values
-    revenue_dist_converted = None
-    if revenue_distribution:
-        revenue_dist_converted = {}
-        for year_str, percentage in revenue_distribution.items():
-            year = int(year_str)
-            # Convert percentage to decimal (e.g., 50% -> 0.5)
-            revenue_dist_converted[year] = percentage / 100.0
-    
-    # Use construction period for debt disbursement
-    return generate_balance_sheet_schedules(
+    params = dict(
         total_debt=total_debt,
         total_construction_cost=total_construction_cost,
         total_land_cost=total_land_cost,
-        land_payment_year=land_payment_year,  # Keep for backwards compatibility
+        land_payment_year=land_payment_year,
+        total_revenue=total_revenue,
+        interest_rate=interest_rate,
+        sga_percentage=sga_percentage,
+        construction_start_year=construction_start_year,
+        construction_end_year=construction_end_year,
+        sales_start_year=sales_start_year,
+        sales_end_year=sales_end_year,
+        debt_repayment_start_year=debt_repayment_start_year,
+        debt_repayment_end_year=debt_repayment_end_year,
+        revenue_booking_start_year=revenue_booking_start_year,
+        revenue_booking_end_year=revenue_booking_end_year,
+        presales_distribution=presales_distribution,
+        revenue_distribution=revenue_distribution,
+        tax_rate=tax_rate,
+        price_increment_factor=price_increment_factor,
+        base_asp=base_asp,
+        total_nsa=total_nsa,
         land_payment_start_year=land_payment_start_year,
         land_payment_years=land_payment_years,
+        presales_segment=presales_segment,
+        presales_region=presales_region
+    )
+    return generate_balance_sheet_schedules(**_simplified_schedule_kwargs(params))
+
+
+def generate_balance_sheet_schedules_batch(
+    total_debt: Union[float, np.ndarray],  # Scalar or (B,)
+    total_construction_cost: Union[float, np.ndarray],  # Scalar or (B,)
+    total_land_cost: Union[float, np.ndarray],  # Scalar or (B,)
+    land_payment_year: int = None,  # Deprecated - kept for backwards compatibility
+    presales_schedule: Dict[int, float] = None,  # {year: presale_amount}
+    interest_rate: Union[float, Dict[int, float], List[float], np.ndarray] = 0.0,  # Scalar, curve, (B, 1) or (B, n_years)
+    sga_percentage: Union[float, np.ndarray] = 0.0,  # Scalar or (B,) candidates
+    debt_disbursement_start_year: int = None,
+    debt_disbursement_end_year: int = None,
+    debt_repayment_start_year: int = None,
+    debt_repayment_end_year: int = None,
+    revenue_booking_start_year: int = None,
+    revenue_booking_end_year: int = None,
+    revenue_distribution: Optional[Union[Dict[int, float], np.ndarray]] = None,  # {year: pct} or (B, n_years)
+    project_start_year: int = None,
+    project_end_year: int = None,
+    tax_rate: Union[float, np.ndarray] = 0.2,  # Scalar or (B,)
+    cash_collection_schedules: Optional[Dict[int, Dict[int, float]]] = None,
+    land_payment_start_year: int = None,
+    land_payment_years: int = 1,
+    first_tranche_percentage: Union[float, np.ndarray] = 0.3,  # Default collection curve, scalar or (B,)
+    presales_multiplier: Union[float, np.ndarray] = 1.0,  # Scales presales_schedule, scalar or (B,)
+    presales_amounts: Optional[np.ndarray] = None  # (n_years,) or (B, n_years), overrides presales_schedule amounts
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized version of generate_balance_sheet_schedules for a batch of parameter sets.
+    
+    Project structure (amounts and year windows) is shared; the parameters marked as
+    batched accept arrays with a leading batch dimension B and every schedule is
+    computed for all B candidates at once. With scalar inputs B == 1 and the results
+    match generate_balance_sheet_schedules.
+    
+    Args:
+        Same as generate_balance_sheet_schedules, plus:
+        interest_rate: Read as in generate_balance_sheet_schedules when scalar, a
+            {year: rate} curve or a 1-D sequence of length n_years (one curve). Batches
+            are 2-D: a (B, 1) column of flat-rate candidates or a (B, n_years) matrix of
+            rate paths aligned to the project timeline
+        revenue_distribution: Either {year: percentage} as decimals, or an array of
+            decimals aligned to the project timeline, shape (n_years,) or (B, n_years)
+        first_tranche_percentage: Share of presales collected in the presale year under
+            the default collection curve (ignored when cash_collection_schedules is given)
+        presales_multiplier: Scales every presale amount (and therefore total revenue)
+        presales_amounts: Presale amounts aligned to the project timeline, replacing the
+            amounts in presales_schedule (which then only sets the timeline and, with
+            cash_collection_schedules, the presale years that are collected)
+    
+    Returns:
+        Dict with 'Year' (n_years,) and one (B, n_years) array per schedule column of
+        generate_balance_sheet_schedules (no 'Total' row; see schedule_batch_to_dataframe)
+    """
+    presales_schedule = presales_schedule or {}
+    project_start_year, project_end_year, land_payment_start_year, land_payment_years = _resolve_timeline(
         presales_schedule=presales_schedule,
-        interest_rate=interest_rate,
-        sga_percentage=sga_percentage,
-        debt_disbursement_start_year=construction_start_year,
-        debt_disbursement_end_year=construction_end_year,
+        debt_disbursement_start_year=debt_disbursement_start_year,
+        debt_disbursement_end_year=debt_disbursement_end_year,
         debt_repayment_start_year=debt_repayment_start_year,
         debt_repayment_end_year=debt_repayment_end_year,
         revenue_booking_start_year=revenue_booking_start_year,
         revenue_booking_end_year=revenue_booking_end_year,
-        revenue_distribution=revenue_dist_converted,
-        tax_rate=tax_rate
+        project_start_year=project_start_year,
+        project_end_year=project_end_year,
+        land_payment_year=land_payment_year,
+        land_payment_start_year=land_payment_start_year,
+        land_payment_years=land_payment_years
+    )
+    
+    years = list(range(project_start_year, project_end_year + 1))
+    n_years = len(years)
+    year_array = np.arange(project_start_year, project_end_year + 1)
+    
+    # Batched parameters as (B, 1) columns so they broadcast against (B, n_years)
+    if isinstance(interest_rate, dict) or np.ndim(interest_rate) < 2:
+        # Same meaning as the scalar engine: one flat rate or one per-year curve
+        interest_rate = _interest_rate_by_year(interest_rate, years)[np.newaxis, :]
+    else:
+        interest_rate = np.asarray(interest_rate, dtype=float)
+        if interest_rate.ndim != 2 or interest_rate.shape[1] not in (1, n_years):
+            raise ValueError(
+                f"Batched interest rates must be (B, 1) or (B, {n_years}); got shape {interest_rate.shape}"
+            )
+    sga_percentage = np.atleast_1d(np.asarray(sga_percentage, dtype=float))[:, np.newaxis]
+    presales_multiplier = np.atleast_1d(np.asarray(presales_multiplier, dtype=float))[:, np.newaxis]
+    tax_rate = np.atleast_1d(np.asarray(tax_rate, dtype=float))[:, np.newaxis]
+    total_debt = np.asarray(total_debt, dtype=float)
+    total_construction_cost = np.asarray(total_construction_cost, dtype=float)
+    total_land_cost = np.asarray(total_land_cost, dtype=float)
+    
+    # 1-3. Debt disbursement, construction cost and debt repayment (linear over windows)
+    debt_disbursement = _window_schedule(
+        project_start_year, n_years, debt_disbursement_start_year, debt_disbursement_end_year, total_debt
+    )
+    construction_cost = _window_schedule(
+        project_start_year, n_years, debt_disbursement_start_year, debt_disbursement_end_year, total_construction_cost
+    )
+    debt_repayment = -_window_schedule(
+        project_start_year, n_years, debt_repayment_start_year, debt_repayment_end_year, total_debt
+    )
+    
+    # 4. Presales bookings and cash collection
+    if presales_amounts is not None:
+        base_presales = np.atleast_2d(np.asarray(presales_amounts, dtype=float))
+        if base_presales.shape[1] != n_years:
+            raise ValueError(
+                f"Presales amounts have {base_presales.shape[1]} columns for {n_years} timeline years"
+            )
+        base_revenue = base_presales.sum(axis=1, keepdims=True)
+    else:
+        base_presales = np.zeros(n_years)
+        for year, amount in presales_schedule.items():
+            if project_start_year <= year <= project_end_year:
+                base_presales[year - project_start_year] = amount
+        base_revenue = sum(presales_schedule.values())
+    presales = presales_multiplier * base_presales
+    
+    collection = _collection_matrix(
+        years, presales_schedule, cash_collection_schedules, debt_disbursement_end_year, first_tranche_percentage
+    )
+    collectible = np.where(presales > 0, presales, 0.0)
+    cash_inflow_presales = np.matmul(collectible[..., np.newaxis, :], collection)[..., 0, :]
+    
+    # 5. SG&A on actual cash collected
+    sga_expense = np.where(cash_inflow_presales > 0, cash_inflow_presales * sga_percentage, 0.0)
+    cash_outflow_sga = -sga_expense
+    
+    # 6. Land cost payment
+    land_cost = np.zeros(n_years)
+    if np.any(total_land_cost > 0) and land_payment_start_year is not None:
+        land_cost = _window_schedule(
+            project_start_year, n_years, land_payment_start_year,
+            land_payment_start_year + land_payment_years - 1, np.maximum(total_land_cost, 0.0)
+        )
+    
+    # 7. Revenue recognition
+    total_revenue = presales_multiplier * base_revenue  # (B, 1)
+    booking_window = (year_array >= revenue_booking_start_year) & (year_array <= revenue_booking_end_year)
+    if isinstance(revenue_distribution, dict) and revenue_distribution:
+        revenue_weights = np.array([revenue_distribution.get(year, 0.0) for year in years])
+    elif isinstance(revenue_distribution, np.ndarray):
+        revenue_weights = np.atleast_2d(revenue_distribution.astype(float))
+    else:
+        booking_years = revenue_booking_end_year - revenue_booking_start_year + 1
+        revenue_weights = np.full(n_years, 1.0 / booking_years if booking_years > 0 else 0.0)
+    revenue_recognition = np.where(booking_window, total_revenue * revenue_weights, 0.0)
+    
+    batch_shape = np.broadcast_shapes(
+        interest_rate.shape, sga_percentage.shape, presales.shape, tax_rate.shape,
+        cash_inflow_presales.shape, revenue_recognition.shape,
+        debt_disbursement.shape, construction_cost.shape, land_cost.shape
+    )
+    
+    # 8. Debt balance and interest on the average annual balance
+    debt_balance = np.cumsum(debt_disbursement + debt_repayment, axis=-1)
+    starting_balance = np.concatenate([np.zeros_like(debt_balance[..., :1]), debt_balance[..., :-1]], axis=-1)
+    average_balance = (starting_balance + debt_balance) / 2
+    total_interest = np.broadcast_to(average_balance * interest_rate, batch_shape)
+    
+    is_construction_period = year_array < revenue_booking_start_year
+    capitalize = is_construction_period & (total_interest > 0)
+    interest_capitalized = np.where(capitalize, total_interest, 0.0)
+    interest_expense_cash = np.where(~capitalize & (average_balance > 0), total_interest, 0.0)
+    cash_outflow_interest = -(interest_capitalized + interest_expense_cash)
+    
+    # Inventory and COGS: released in proportion to revenue, fully cleared in the last booking year
+    inventory_addition = construction_cost + land_cost + interest_capitalized
+    total_expected_inventory = (
+        (total_construction_cost + total_land_cost)[..., np.newaxis] + np.cumsum(interest_capitalized, axis=-1)
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        revenue_percentage = np.where(total_revenue > 0, revenue_recognition / total_revenue, 0.0)
+    releasing = booking_window & (total_revenue > 0)
+    cogs = np.where(releasing, total_expected_inventory * revenue_percentage, 0.0)
+    
+    if revenue_booking_end_year is not None and project_start_year <= revenue_booking_end_year <= project_end_year:
+        end_idx = revenue_booking_end_year - project_start_year
+        remaining = inventory_addition[..., :end_idx + 1].sum(axis=-1) - cogs[..., :end_idx].sum(axis=-1)
+        cogs[..., end_idx] = np.where(releasing[..., end_idx], remaining, cogs[..., end_idx])
+    inventory_balance = np.cumsum(inventory_addition - cogs, axis=-1)
+    
+    # 9. Customer prepayment balance
+    customer_prepayment_balance = np.cumsum(cash_inflow_presales - revenue_recognition, axis=-1)
+    
+    # 10. P&L
+    pbt = revenue_recognition - cogs - sga_expense - interest_expense_cash
+    tax_expense = np.where(pbt > 0, pbt * tax_rate, 0.0)
+    cash_outflow_tax = -tax_expense
+    pat = pbt - tax_expense
+    
+    # 11. Net cash flow
+    cash_outflow_construction = -construction_cost
+    cash_outflow_land = -land_cost
+    cash_balance_change = (
+        cash_inflow_presales
+        + debt_disbursement
+        + cash_outflow_construction
+        + cash_outflow_land
+        + cash_outflow_interest
+        + cash_outflow_sga
+        + cash_outflow_tax
+        + debt_repayment
     )
+    cumulative_cash_balance = np.cumsum(cash_balance_change, axis=-1)
+    
+    schedules = {
+        'Debt_Balance': debt_balance,
+        'Land_Cost': land_cost,
+        'Construction_Cost': construction_cost,
+        'Interest_Capitalized': interest_capitalized,
+        'Inventory_Addition': inventory_addition,
+        'Inventory_Balance': inventory_balance,
+        'Presales': presales,
+        'Customer_Prepayment_Balance': customer_prepayment_balance,
+        'Revenue_Recognition': revenue_recognition,
+        'COGS': cogs,
+        'SGA_Expense': sga_expense,
+        'Interest_Expense_Cash': interest_expense_cash,
+        'PBT': pbt,
+        'Tax': tax_expense,
+        'PAT': pat,
+        'Cash_Inflow_Presales': cash_inflow_presales,
+        'Debt_Disbursement': debt_disbursement,
+        'Debt_Repayment': debt_repayment,
+        'Cash_Outflow_Land': cash_outflow_land,
+        'Cash_Outflow_Construction': cash_outflow_construction,
+        'Cash_Outflow_Interest': cash_outflow_interest,
+        'Cash_Outflow_SGA': cash_outflow_sga,
+        'Cash_Outflow_Tax': cash_outflow_tax,
+        'Cash_Balance_Change': cash_balance_change,
+        'Cumulative_Cash_Balance': cumulative_cash_balance
+    }
+    
+    result = {'Year': year_array}
+    for column, values in schedules.items():
+        result[column] = np.ascontiguousarray(np.broadcast_to(values, batch_shape), dtype=float)
+    return result
+
+
+def schedule_batch_to_dataframe(batch: Dict[str, np.ndarray], index: int = 0) -> pd.DataFrame:
+    """
+    Extract one parameter set from a batch result in the generate_balance_sheet_schedules layout.
+    
+    Args:
+        batch: Result of generate_balance_sheet_schedules_batch
+        index: Position in the batch dimension
+    
+    Returns:
+        DataFrame with one row per year and a 'Total' row
+    """
+    years = batch['Year'].tolist()
+    return _build_schedule_dataframe(years, {
+        column: values[index] for column, values in batch.items() if column != 'Year'
+    })
+
+
+def generate_rate_path_scenarios(
+    rate_paths: Dict[str, Union[float, Dict[int, float], List[float]]],
+    **schedule_kwargs
+) -> Dict[str, pd.DataFrame]:
+    """
+    Run one project under several interest-rate paths in a single batched pass.
+    
+    Debt balances do not depend on the rate, so every path shares them; interest,
+    its capitalised vs. expensed split and everything downstream are broadcast across
+    the paths instead of rerunning the model per path.
+    
+    Args:
+        rate_paths: {scenario_name: rate} where each rate is a flat rate, a
+            {year: rate} curve or a list aligned to the project timeline, e.g.
+            {'base': 0.09, '+200bp': 0.11, 'easing': {2025: 0.09, 2026: 0.08, 2027: 0.075}}
+        **schedule_kwargs: Remaining arguments of generate_balance_sheet_schedules
+    
+    Returns:
+        {scenario_name: schedule DataFrame} in the generate_balance_sheet_schedules layout
+    """
+    schedule_kwargs = dict(schedule_kwargs)
+    schedule_kwargs.pop('interest_rate', None)
+    project_start_year, project_end_year, _, _ = _timeline_from_kwargs(schedule_kwargs)
+    years = list(range(project_start_year, project_end_year + 1))
+    
+    names = list(rate_paths)
+    rate_matrix = np.vstack([_interest_rate_by_year(rate_paths[name], years) for name in names])
+    batch = generate_balance_sheet_schedules_batch(interest_rate=rate_matrix, **schedule_kwargs)
+    
+    return {name: schedule_batch_to_dataframe(batch, i) for i, name in enumerate(names)}
+
+
+def generate_simplified_schedules_batch(param_sets: List[Dict]) -> List[Dict[str, np.ndarray]]:
+    """
+    Run many generate_simplified_balance_sheet_schedules parameter sets as batched passes.
+    
+    Parameter sets that resolve to the same timeline and year windows are stacked into
+    one call to generate_balance_sheet_schedules_batch, with amounts, rates, tax,
+    presales and revenue-booking patterns batched per set. Sets that differ in their
+    windows simply form separate groups.
+    
+    Args:
+        param_sets: List of keyword-argument dicts for generate_simplified_balance_sheet_schedules
+    
+    Returns:
+        One dict per parameter set, in input order, with 'Year' and an (n_years,) array per
+        schedule column (see schedule_batch_to_dataframe for the DataFrame layout)
+    """
+    signature = inspect.signature(generate_simplified_balance_sheet_schedules)
+    groups: Dict[Tuple, List[Tuple[int, Dict]]] = {}
+    for position, params in enumerate(param_sets):
+        bound = signature.bind(**params)
+        bound.apply_defaults()
+        kwargs = _simplified_schedule_kwargs(dict(bound.arguments))
+        timeline = _timeline_from_kwargs(kwargs)
+        key = timeline + tuple(kwargs[name] for name in (
+            'debt_disbursement_start_year', 'debt_disbursement_end_year',
+            'debt_repayment_start_year', 'debt_repayment_end_year',
+            'revenue_booking_start_year', 'revenue_booking_end_year'
+        ))
+        groups.setdefault(key, []).append((position, kwargs))
+    
+    results: List[Optional[Dict[str, np.ndarray]]] = [None] * len(param_sets)
+    for key, members in groups.items():
+        project_start_year, project_end_year, land_payment_start_year, land_payment_years = key[:4]
+        years = list(range(project_start_year, project_end_year + 1))
+        first = members[0][1]
+        
+        def stacked(name: str) -> np.ndarray:
+            return np.array([kwargs[name] for _, kwargs in members], dtype=float)
+        
+        presales_amounts = np.array([
+            [kwargs['presales_schedule'].get(year, 0.0) for year in years] for _, kwargs in members
+        ])
+        booking_years = first['revenue_booking_end_year'] - first['revenue_booking_start_year'] + 1
+        linear_share = 1.0 / booking_years if booking_years > 0 else 0.0
+        revenue_distribution = np.array([
+            [kwargs['revenue_distribution'].get(year, 0.0) for year in years]
+            if kwargs['revenue_distribution'] else [linear_share] * len(years)
+            for _, kwargs in members
+        ])
+        
+        batch = generate_balance_sheet_schedules_batch(
+            total_debt=stacked('total_debt'),
+            total_construction_cost=stacked('total_construction_cost'),
+            total_land_cost=stacked('total_land_cost'),
+            presales_schedule=first['presales_schedule'],
+            interest_rate=np.vstack([_interest_rate_by_year(kwargs['interest_rate'], years) for _, kwargs in members]),
+            sga_percentage=stacked('sga_percentage'),
+            debt_disbursement_start_year=first['debt_disbursement_start_year'],
+            debt_disbursement_end_year=first['debt_disbursement_end_year'],
+            debt_repayment_start_year=first['debt_repayment_start_year'],
+            debt_repayment_end_year=first['debt_repayment_end_year'],
+            revenue_booking_start_year=first['revenue_booking_start_year'],
+            revenue_booking_end_year=first['revenue_booking_end_year'],
+            revenue_distribution=revenue_distribution,
+            project_start_year=project_start_year,
+            project_end_year=project_end_year,
+            tax_rate=stacked('tax_rate'),
+            land_payment_start_year=land_payment_start_year,
+            land_payment_years=land_payment_years,
+            presales_amounts=presales_amounts
+        )
+        
+        for row, (position, _) in enumerate(members):
+            results[position] = {
+                column: values if column == 'Year' else values[row] for column, values in batch.items()
+            }
+    
+    return results
 
 
 # Example usage
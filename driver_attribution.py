@@ -0,0 +1,346 @@
+#%%
+import inspect
+from math import factorial
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from balance_sheet_manager import generate_simplified_balance_sheet_schedules, generate_simplified_schedules_batch
+
+# Headline outputs decomposed by driver
+ATTRIBUTION_METRICS = ('PAT', 'cumulative_cash', 'peak_debt')
+
+# Shapley needs 2^k scenarios; beyond this group drivers or use the sequential method
+MAX_SHAPLEY_DRIVERS = 12
+
+OTHER_DRIVER = 'Other'
+
+Drivers = Union[Sequence[str], Dict[str, Sequence[str]]]
+
+
+def schedule_metrics(schedule: Dict[str, np.ndarray]) -> Dict[str, float]:
+    """
+    Headline metrics of one schedule.
+
+    Args:
+        schedule: Year rows of a schedule (DataFrame without 'Total' row, or dict of arrays)
+
+    Returns:
+        {'PAT': lifetime PAT, 'cumulative_cash': final cumulative cash balance,
+         'peak_debt': maximum debt balance}
+    """
+    return {
+        'PAT': float(np.sum(schedule['PAT'])),
+        'cumulative_cash': float(np.asarray(schedule['Cumulative_Cash_Balance'])[-1]),
+        'peak_debt': float(np.max(schedule['Debt_Balance'])),
+    }
+
+
+def _same_value(a, b) -> bool:
+    """Equality that copes with dicts, lists and arrays of assumptions."""
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, dict) or isinstance(b, dict):
+        return a == b
+    try:
+        return bool(np.array_equal(a, b))
+    except (TypeError, ValueError):
+        return a == b
+
+
+def _complete_params(params: Dict) -> Dict:
+    """Fill in the defaults of generate_simplified_balance_sheet_schedules."""
+    bound = inspect.signature(generate_simplified_balance_sheet_schedules).bind(**params)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def changed_parameters(base: Dict, new: Dict) -> List[str]:
+    """Parameters of generate_simplified_balance_sheet_schedules that differ between two sets."""
+    base, new = _complete_params(base), _complete_params(new)
+    return [name for name in base if not _same_value(base[name], new[name])]
+
+
+def _resolve_drivers(changed: List[str], drivers: Optional[Drivers]) -> Dict[str, List[str]]:
+    """
+    Map driver labels to the parameters they switch.
+
+    Changed parameters not covered by `drivers` are lumped into OTHER_DRIVER so the
+    contributions still add up to the full change.
+    """
+    if drivers is None:
+        return {name: [name] for name in changed}
+
+    if isinstance(drivers, dict):
+        groups = {label: [name for name in names if name in changed] for label, names in drivers.items()}
+    else:
+        groups = {name: [name] for name in drivers if name in changed}
+    groups = {label: names for label, names in groups.items() if names}
+
+    covered = {name for names in groups.values() for name in names}
+    remaining = [name for name in changed if name not in covered]
+    if remaining:
+        groups[OTHER_DRIVER] = remaining
+    return groups
+
+
+def _scenario_metrics(base: Dict, new: Dict, groups: List[List[str]], masks: np.ndarray) -> np.ndarray:
+    """
+    Evaluate the scenarios where the driver groups flagged in each bitmask take their
+    new values and the rest keep their base values, as one batched run.
+
+    Returns:
+        Array (len(masks), len(ATTRIBUTION_METRICS))
+    """
+    scenarios = []
+    for mask in masks.tolist():
+        params = dict(base)
+        for bit, names in enumerate(groups):
+            if mask >> bit & 1:
+                params.update({name: new[name] for name in names})
+        scenarios.append(params)
+
+    schedules = generate_simplified_schedules_batch(scenarios)
+    return np.array([
+        [schedule_metrics(schedule)[metric] for metric in ATTRIBUTION_METRICS] for schedule in schedules
+    ])
+
+
+def attribute_drivers(
+    base: Dict,
+    new: Dict,
+    drivers: Optional[Drivers] = None,
+    method: str = 'shapley'
+) -> Dict:
+    """
+    Decompose the change in PAT, cumulative cash and peak debt between two parameter
+    sets of generate_simplified_balance_sheet_schedules into per-driver contributions.
+
+    Every substitution scenario is run through generate_simplified_schedules_batch in a
+    single call rather than one model run per scenario.
+
+    - 'shapley': average marginal effect of each driver over all orderings of the
+      k drivers (2^k scenarios). Order-independent; interaction effects are shared evenly.
+    - 'sequential': switch drivers from base to new one at a time in the given order
+      (k + 1 scenarios). Cheaper, but interactions are credited to later drivers.
+
+    Parameters that only make sense together (e.g. sales years and the presales
+    distribution keyed by them) should be grouped into one driver.
+
+    Args:
+        base: Keyword arguments for generate_simplified_balance_sheet_schedules
+        new: Keyword arguments for the comparison case
+        drivers: Parameter names, or {driver_label: [parameter names]} groups, in
+            substitution order. Defaults to every parameter that differs.
+        method: 'shapley' or 'sequential'
+
+    Returns:
+        Dict with:
+        - base: {metric: value} for the base case
+        - new: {metric: value} for the new case
+        - contributions: DataFrame of drivers x ATTRIBUTION_METRICS summing to new - base
+        - drivers: {driver_label: [parameter names]}
+    """
+    if method not in ('shapley', 'sequential'):
+        raise ValueError(f"Unsupported attribution method: {method}")
+
+    base, new = _complete_params(base), _complete_params(new)
+    groups = _resolve_drivers(changed_parameters(base, new), drivers)
+    labels = list(groups)
+    members = [groups[label] for label in labels]
+    k = len(labels)
+
+    if method == 'shapley':
+        if k > MAX_SHAPLEY_DRIVERS:
+            raise ValueError(
+                f"{k} drivers need {2 ** k} Shapley scenarios; group drivers (max {MAX_SHAPLEY_DRIVERS}) "
+                "or use method='sequential'"
+            )
+        masks = np.arange(2 ** k)
+        values = _scenario_metrics(base, new, members, masks)
+        sizes = np.array([bin(mask).count('1') for mask in masks.tolist()])
+        # Weight of a coalition of size s that excludes the driver: s! (k - s - 1)! / k!
+        weights = np.array([factorial(s) * factorial(k - s - 1) / factorial(k) for s in range(k)])
+
+        contributions = np.zeros((k, len(ATTRIBUTION_METRICS)))
+        for bit in range(k):
+            without = masks[(masks >> bit & 1) == 0]
+            marginal = values[without | (1 << bit)] - values[without]
+            contributions[bit] = weights[sizes[without]] @ marginal
+        base_values, new_values = values[0], values[-1]
+    else:
+        masks = np.array([(1 << step) - 1 for step in range(k + 1)])
+        values = _scenario_metrics(base, new, members, masks)
+        contributions = np.diff(values, axis=0)
+        base_values, new_values = values[0], values[-1]
+
+    return {
+        'base': dict(zip(ATTRIBUTION_METRICS, base_values.tolist())),
+        'new': dict(zip(ATTRIBUTION_METRICS, new_values.tolist())),
+        'contributions': pd.DataFrame(contributions, index=pd.Index(labels, name='driver'),
+                                      columns=list(ATTRIBUTION_METRICS)),
+        'drivers': groups,
+    }
+
+
+def attribution_waterfall(attribution: Dict, metric: str = 'PAT') -> pd.DataFrame:
+    """
+    Waterfall table for one metric: base, each driver's step and the new value.
+
+    Args:
+        attribution: Result of attribute_drivers
+        metric: One of ATTRIBUTION_METRICS
+
+    Returns:
+        DataFrame with columns step, change and running_total
+    """
+    steps = attribution['contributions'][metric]
+    rows = [{'step': 'Base', 'change': attribution['base'][metric]}]
+    rows += [{'step': label, 'change': float(change)} for label, change in steps.items()]
+    waterfall = pd.DataFrame(rows)
+    waterfall['running_total'] = waterfall['change'].cumsum()
+    final = {'step': 'New', 'change': attribution['new'][metric], 'running_total': attribution['new'][metric]}
+    return pd.concat([waterfall, pd.DataFrame([final])], ignore_index=True)
+
+
+def random_simplified_cases(n_cases: int = 300, seed: int = 0) -> List[Dict]:
+    """
+    Random generate_simplified_balance_sheet_schedules inputs covering overlapping and
+    disjoint year windows, single- and multi-year land payments, custom revenue
+    distributions, price increments and per-year rate curves.
+
+    Args:
+        n_cases: Number of parameter sets
+        seed: Random seed
+
+    Returns:
+        List of keyword-argument dicts
+    """
+    rng = np.random.default_rng(seed)
+    cases = []
+    for _ in range(n_cases):
+        start = int(rng.integers(2018, 2025))
+        construction_end = start + int(rng.integers(0, 5))
+        sales_start = start + int(rng.integers(0, 3))
+        sales_end = sales_start + int(rng.integers(0, 5))
+        booking_start = construction_end + int(rng.integers(-1, 3))
+        booking_end = booking_start + int(rng.integers(0, 4))
+        repayment_start = booking_start + int(rng.integers(-1, 3))
+        repayment_end = repayment_start + int(rng.integers(0, 4))
+
+        params = dict(
+            total_debt=float(rng.uniform(0, 2e9)),
+            total_construction_cost=float(rng.uniform(1e8, 1e9)),
+            total_land_cost=float(rng.choice([0.0, rng.uniform(1e8, 5e8)])),
+            total_revenue=float(rng.uniform(5e8, 3e9)),
+            interest_rate=float(rng.choice([0.0, rng.uniform(0, 0.15)])),
+            sga_percentage=float(rng.uniform(0, 0.1)),
+            construction_start_year=start,
+            construction_end_year=construction_end,
+            sales_start_year=sales_start,
+            sales_end_year=sales_end,
+            debt_repayment_start_year=repayment_start,
+            debt_repayment_end_year=repayment_end,
+            revenue_booking_start_year=booking_start,
+            revenue_booking_end_year=booking_end,
+            presales_distribution={
+                str(year): float(rng.uniform(0, 50)) for year in range(sales_start, sales_end + 1)
+            },
+            tax_rate=float(rng.choice([0.2, rng.uniform(0, 0.3)])),
+        )
+        land = rng.random()
+        if land < 0.3:
+            params['land_payment_year'] = start
+        elif land < 0.6:
+            params['land_payment_start_year'] = start
+            params['land_payment_years'] = int(rng.integers(1, 4))
+        if rng.random() < 0.3:
+            params['revenue_distribution'] = {
+                str(year): float(rng.uniform(0, 60)) for year in range(booking_start, booking_end + 1)
+            }
+        if rng.random() < 0.3:
+            params.update(price_increment_factor=0.05, base_asp=50.0, total_nsa=1e7)
+        if rng.random() < 0.2:
+            params['interest_rate'] = {start: 0.08, start + 2: float(rng.uniform(0.05, 0.15))}
+        cases.append(params)
+    return cases
+
+
+def check_simplified_batch(n_cases: int = 300, seed: int = 0) -> pd.DataFrame:
+    """
+    Compare generate_simplified_schedules_batch against one
+    generate_simplified_balance_sheet_schedules call per parameter set.
+
+    Args:
+        n_cases: Number of random parameter sets (see random_simplified_cases)
+        seed: Random seed
+
+    Returns:
+        DataFrame with case, n_years and the largest absolute difference over all
+        schedule columns and years
+    """
+    cases = random_simplified_cases(n_cases, seed)
+    batched = generate_simplified_schedules_batch(cases)
+
+    rows = []
+    for i, (params, batch) in enumerate(zip(cases, batched)):
+        scalar = generate_simplified_balance_sheet_schedules(**params).iloc[:-1]
+        columns = scalar.columns[1:]
+        if len(scalar) != len(batch['Year']):
+            max_diff = np.inf
+        else:
+            max_diff = float(np.max(np.abs(
+                scalar[columns].to_numpy(dtype=float) - np.vstack([batch[c] for c in columns]).T
+            )))
+        rows.append({'case': i, 'n_years': len(scalar), 'max_abs_diff': max_diff})
+    return pd.DataFrame(rows)
+
+
+# Example usage
+if __name__ == "__main__":
+    base = dict(
+        total_debt=1000000000,
+        total_construction_cost=800000000,
+        total_land_cost=300000000,
+        land_payment_year=2024,
+        total_revenue=1500000000,
+        interest_rate=0.08,
+        sga_percentage=0.05,
+        construction_start_year=2024,
+        construction_end_year=2026,
+        sales_start_year=2025,
+        sales_end_year=2027,
+        debt_repayment_start_year=2027,
+        debt_repayment_end_year=2028,
+        revenue_booking_start_year=2027,
+        revenue_booking_end_year=2028,
+        presales_distribution={'2025': 30, '2026': 50, '2027': 20}
+    )
+    new = dict(
+        base,
+        interest_rate={2024: 0.08, 2025: 0.10, 2027: 0.09},
+        total_debt=1100000000,
+        total_construction_cost=880000000,
+        total_revenue=1400000000,
+        presales_distribution={'2025': 15, '2026': 45, '2027': 40},
+        sga_percentage=0.06
+    )
+
+    shapley = attribute_drivers(base, new)
+    print("Base:", {k: round(v) for k, v in shapley['base'].items()})
+    print("New: ", {k: round(v) for k, v in shapley['new'].items()})
+    print("\nShapley contributions:")
+    print(shapley['contributions'].round(0))
+
+    sequential = attribute_drivers(base, new, method='sequential')
+    print("\nSequential contributions:")
+    print(sequential['contributions'].round(0))
+
+    print("\nPAT waterfall:")
+    print(attribution_waterfall(shapley, 'PAT').round(0).to_string(index=False))
+
+    check = check_simplified_batch()
+    print(f"\nSimplified batch vs scalar on {len(check)} random cases: "
+          f"max_abs_diff {check['max_abs_diff'].max():.3e}, "
+          f"{int((check['max_abs_diff'] > 1e-3).sum())} cases above 1e-3")
@@ -0,0 +1,282 @@
+#%%
+import glob
+import os
+import re
+import sqlite3
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from financial_statement_parser import file_content_hash, fold_accents, iter_pages
+
+DEFAULT_INDEX_PATH = os.path.join('data', 'filings_index.sqlite')
+DEFAULT_CORPUS_GLOB = os.path.join('data', '*_ocr_extracted*.txt')
+
+TOKEN_RE = re.compile(r'\w+')
+# Filenames look like "2_ HDG_ BCTC hop nhat 6T 2025.pdf_ocr_extracted-2.txt"
+TICKER_RE = re.compile(r'(?<![A-Za-z])([A-Z]{3})(?![A-Za-z])')
+PERIOD_RE = re.compile(r'\b(\d{1,2}T|Q[1-4]|[1-4]Q)\s*(\d{4})\b|\b(20\d{2})\b')
+
+SNIPPET_RADIUS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    content_hash TEXT NOT NULL,
+    ticker TEXT,
+    period TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    doc_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (doc_id, page)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    folded INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    tf INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_postings_term ON postings (term, folded);
+CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+"""
+
+
+def normalize_text(text: str, fold: bool = False) -> str:
+    """Lowercase and NFC-normalise text, optionally stripping diacritics."""
+    text = unicodedata.normalize('NFC', text).lower()
+    return fold_accents(text) if fold else text
+
+
+def tokenize(text: str, fold: bool = False) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_RE.findall(normalize_text(text, fold=fold))
+
+
+def parse_filing_name(file_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Infer ticker and reporting period from an OCR'd filing's filename.
+
+    Args:
+        file_path: Path such as 'data/2_ HDG_ BCTC hop nhat 6T 2025.pdf_ocr_extracted-2.txt'
+
+    Returns:
+        Tuple of (ticker, period), e.g. ('HDG', '6T 2025'); None where not found
+    """
+    name = os.path.basename(file_path).split('.pdf')[0]
+    ticker_match = TICKER_RE.search(name)
+    ticker = ticker_match.group(1) if ticker_match else None
+
+    period = None
+    period_match = PERIOD_RE.search(name)
+    if period_match:
+        if period_match.group(1):
+            period = f"{period_match.group(1)} {period_match.group(2)}"
+        else:
+            period = period_match.group(3)
+    return ticker, period
+
+
+def open_index(index_path: str = DEFAULT_INDEX_PATH) -> sqlite3.Connection:
+    """Open (and create if needed) the on-disk index."""
+    os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(index_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _remove_document(conn: sqlite3.Connection, doc_id: int) -> None:
+    conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+    conn.execute("DELETE FROM pages WHERE doc_id = ?", (doc_id,))
+    conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+
+def _index_document(conn: sqlite3.Connection, file_path: str, content_hash: str) -> int:
+    """Stream one filing page by page into the index; returns its doc_id."""
+    ticker, period = parse_filing_name(file_path)
+    cursor = conn.execute(
+        "INSERT INTO documents (path, content_hash, ticker, period) VALUES (?, ?, ?, ?)",
+        (file_path, content_hash, ticker, period)
+    )
+    doc_id = cursor.lastrowid
+
+    for page_number, lines in iter_pages(file_path):
+        text = '\n'.join(lines)
+        conn.execute(
+            "INSERT OR REPLACE INTO pages (doc_id, page, text) VALUES (?, ?, ?)",
+            (doc_id, page_number, text)
+        )
+        exact_counts = Counter(tokenize(text))
+        folded_counts = Counter(tokenize(text, fold=True))
+        conn.executemany(
+            "INSERT INTO postings (term, folded, doc_id, page, tf) VALUES (?, 0, ?, ?, ?)",
+            [(term, doc_id, page_number, tf) for term, tf in exact_counts.items()]
+        )
+        conn.executemany(
+            "INSERT INTO postings (term, folded, doc_id, page, tf) VALUES (?, 1, ?, ?, ?)",
+            [(term, doc_id, page_number, tf) for term, tf in folded_counts.items()]
+        )
+    return doc_id
+
+
+def update_index(
+    corpus_glob: str = DEFAULT_CORPUS_GLOB,
+    index_path: str = DEFAULT_INDEX_PATH
+) -> Dict[str, int]:
+    """
+    Incrementally index the OCR'd filings matching `corpus_glob`.
+
+    New files are added, files whose content hash changed are re-indexed and
+    files that no longer exist are dropped. Unchanged files are not re-read.
+
+    Args:
+        corpus_glob: Glob for the extracted text files
+        index_path: Location of the SQLite index
+
+    Returns:
+        Counts of {'added', 'updated', 'removed', 'unchanged'} documents
+    """
+    stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+    conn = open_index(index_path)
+    try:
+        indexed = {
+            path: (doc_id, content_hash)
+            for doc_id, path, content_hash in conn.execute(
+                "SELECT doc_id, path, content_hash FROM documents"
+            )
+        }
+        current_paths = set(glob.glob(corpus_glob))
+
+        with conn:
+            for path in sorted(set(indexed) - current_paths):
+                _remove_document(conn, indexed[path][0])
+                stats['removed'] += 1
+
+            for path in sorted(current_paths):
+                content_hash = file_content_hash(path)
+                if path in indexed:
+                    doc_id, indexed_hash = indexed[path]
+                    if indexed_hash == content_hash:
+                        stats['unchanged'] += 1
+                        continue
+                    _remove_document(conn, doc_id)
+                    stats['updated'] += 1
+                else:
+                    stats['added'] += 1
+                _index_document(conn, path, content_hash)
+    finally:
+        conn.close()
+
+    return stats
+
+
+def _snippet(text: str, phrase: str, fold: bool) -> str:
+    """Cut a short excerpt of the page around the first phrase occurrence."""
+    # NFC and accent folding can change string length, so locate the match on
+    # a per-character normalised copy to keep offsets aligned with the page.
+    normalized = ''.join(normalize_text(ch, fold=fold)[:1] or ' ' for ch in text)
+    position = normalized.find(phrase)
+    if position < 0:
+        return text[:2 * SNIPPET_RADIUS].replace('\n', ' ')
+    start = max(0, position - SNIPPET_RADIUS)
+    end = min(len(text), position + len(phrase) + SNIPPET_RADIUS)
+    return text[start:end].replace('\n', ' ')
+
+
+def search(
+    query: str,
+    fold: bool = False,
+    phrase: bool = True,
+    ticker: Optional[str] = None,
+    limit: Optional[int] = 50,
+    index_path: str = DEFAULT_INDEX_PATH
+) -> List[Dict]:
+    """
+    Find pages containing all query terms.
+
+    Args:
+        query: Search text, e.g. 'Hàng tồn kho' or 'Người mua trả tiền trước'
+        fold: Match ignoring diacritics ('hang ton kho' finds 'Hàng tồn kho')
+        phrase: Require the terms to appear consecutively on the page
+        ticker: Optional ticker filter
+        limit: Maximum hits to return (None for all)
+        index_path: Location of the SQLite index
+
+    Returns:
+        List of dicts with keys: ticker, period, page, path, score, snippet,
+        ordered by descending term frequency
+    """
+    terms = tokenize(query, fold=fold)
+    if not terms:
+        return []
+
+    conn = open_index(index_path)
+    try:
+        # Intersect page postings, rarest term first
+        postings_by_term = {}
+        for term in set(terms):
+            rows = conn.execute(
+                "SELECT doc_id, page, tf FROM postings WHERE term = ? AND folded = ?",
+                (term, int(fold))
+            ).fetchall()
+            postings_by_term[term] = {(doc_id, page): tf for doc_id, page, tf in rows}
+
+        ordered = sorted(postings_by_term.values(), key=len)
+        candidates = set(ordered[0])
+        for postings in ordered[1:]:
+            candidates &= postings.keys()
+            if not candidates:
+                return []
+
+        documents = {
+            doc_id: (path, doc_ticker, period)
+            for doc_id, path, doc_ticker, period in conn.execute(
+                "SELECT doc_id, path, ticker, period FROM documents"
+            )
+        }
+
+        query_phrase = ' '.join(terms)
+        hits = []
+        for doc_id, page in candidates:
+            path, doc_ticker, period = documents[doc_id]
+            if ticker is not None and doc_ticker != ticker:
+                continue
+
+            page_text = conn.execute(
+                "SELECT text FROM pages WHERE doc_id = ? AND page = ?", (doc_id, page)
+            ).fetchone()[0]
+            if phrase and len(terms) > 1:
+                if query_phrase not in ' '.join(tokenize(page_text, fold=fold)):
+                    continue
+
+            hits.append({
+                'ticker': doc_ticker,
+                'period': period,
+                'page': page,
+                'path': path,
+                'score': sum(postings_by_term[term][(doc_id, page)] for term in set(terms)),
+                'snippet': _snippet(page_text, normalize_text(query.strip(), fold=fold), fold),
+            })
+    finally:
+        conn.close()
+
+    hits.sort(key=lambda hit: (-hit['score'], hit['ticker'] or '', hit['period'] or '', hit['page']))
+    return hits[:limit] if limit is not None else hits
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    print("Updating index:", update_index())
+
+    for query, fold in [('Hàng tồn kho', False), ('nguoi mua tra tien truoc', True)]:
+        start = time.perf_counter()
+        results = search(query, fold=fold)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"\n'{query}' (fold={fold}): {len(results)} hits in {elapsed_ms:.1f} ms")
+        for hit in results[:5]:
+            print(f"  {hit['ticker']} {hit['period']} p.{hit['page']}: {hit['snippet']}")
@@ -0,0 +1,407 @@
+#%%
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Page delimiter written by the OCR extraction step, e.g. "--- Page 6 ---"
+PAGE_MARKER_RE = re.compile(r'^--- Page (\d+) ---\s*$')
+
+# Section headers are matched against accent-folded, UPPERCASE text. OCR often
+# mangles Vietnamese diacritics ("BẰNG CÂN ĐÓI KÉ TOÁN"), folding makes the
+# headers robust to that, and requiring uppercase skips the table of contents.
+SECTION_PATTERNS = {
+    'balance_sheet': re.compile(r'BANG CAN DOI KE TOAN'),
+    'income_statement': re.compile(r'KET QUA HOAT DONG KINH DOANH'),
+    'cash_flow': re.compile(r'LUU CHUYEN TIEN TE'),
+}
+# The notes to the financial statements close the primary statements
+NOTES_PATTERN = re.compile(r'THUYET MINH')
+
+# Vietnamese amounts: dot thousands separators, parenthesised negatives.
+# OCR sometimes swaps dots for commas or inserts a space after a separator.
+VN_NUMBER_RE = re.compile(r'(?<![\d.,])(\(?)(\d{1,3}(?:[.,]{1,2} ?\d{3}){2,})(\)?)(?![\d])')
+NUMBER_SEPARATOR_RE = re.compile(r'[.,\s]')
+
+# Numeric-only lines in which OCR confused digits with letters (I, l, O)
+NUMERIC_LINE_RE = re.compile(r'^[\d.,()\sIlO—\-]+$')
+OCR_DIGIT_FIXES = str.maketrans({'I': '1', 'l': '1', 'O': '0'})
+
+# Inline row: "Tiền thu từ đi vay 33 1.510.000.000 18.711.981.263". Subtotal rows may
+# print only their formula as the label: "(50 = 20+30+40) 50 529.574.852 ..."
+FORMULA_LABEL = r'\(\d{2,3}\s*=[^)]*\)'
+INLINE_ROW_RE = re.compile(
+    r'^(?P<label>.*?[^\W\d_].*?|' + FORMULA_LABEL + r')\s+(?P<code>\d{2,3}[a-z]?)\s+'
+    r'(?:(?P<note>V[.,]?\S*)\s+)?(?P<values>[\d(\-].*)$'
+)
+FORMULA_LABEL_RE = re.compile(r'^' + FORMULA_LABEL + r'$')
+# Inline row whose amounts were printed further down the page: "Tiền ... cuối năm 70"
+PENDING_ROW_RE = re.compile(r'^(?P<label>.*?[^\W\d_].*?)\s+(?P<code>\d{2,3}[a-z]?)$')
+NIL_VALUE_RE = re.compile(r'(?:^|\s)-(?=\s|$)')
+# Anything left in an inline value field after removing amounts and dashes
+VALUE_RESIDUE_RE = re.compile(r'[^\s\-—]')
+# A garbled trailing amount ("245.549,342.42/7") leaves only digits and punctuation behind
+GARBLED_AMOUNT_RE = re.compile(r'^[\d.,/\'’\s\-—]+$')
+
+# The signature block ends the statement; names and titles are not line items
+SIGNATURE_RE = re.compile(r'NGUOI LAP BIEU|KE TOAN TRUONG|GIAM DOC')
+
+# Column-layout pages print all labels, then an "MS" (mã số) column of codes,
+# then the amount columns one after the other, each headed by its period date.
+CODE_HEADER_RE = re.compile(r'^MS$')
+PERIOD_HEADER_RE = re.compile(r'^\d{2}/\d{2}/\d{4}$')
+CODE_TOKEN_RE = re.compile(r'^[0-9A-Za-z]{2,4}$')
+FORMULA_LINE_RE = re.compile(r'^\(.*=.*\)$')
+COLUMN_HEADERS = {'CHI TIEU', 'TAI SAN', 'NGUON VON'}
+# Cash flow group headings ("II. Lưu chuyển tiền từ hoạt động đầu tư") carry no code
+ROMAN_HEADING_RE = re.compile(r'^[IVX]+[.,]\s')
+
+# Parsed results keyed by the SHA-256 of the file content
+_PARSE_CACHE: Dict[str, pd.DataFrame] = {}
+
+
+def fold_accents(text: str) -> str:
+    """Strip Vietnamese diacritics (including đ/Đ) from text."""
+    decomposed = unicodedata.normalize('NFD', text)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.replace('đ', 'd').replace('Đ', 'D')
+
+
+def parse_vn_number(token: str) -> Optional[int]:
+    """
+    Convert a Vietnamese-formatted amount to an integer.
+
+    Args:
+        token: Amount such as '3.104.431.737.675' or '(527.866.751.449)'
+
+    Returns:
+        Integer amount (negative if parenthesised), or None if not numeric
+    """
+    token = token.strip()
+    negative = token.startswith('(') and token.endswith(')')
+    digits = NUMBER_SEPARATOR_RE.sub('', token.strip('()'))
+    if not digits.isdigit():
+        return None
+    value = int(digits)
+    return -value if negative else value
+
+
+def extract_amounts(text: str) -> List[int]:
+    """Return all Vietnamese-formatted amounts found in a line, in order."""
+    if NUMERIC_LINE_RE.match(text):
+        text = text.translate(OCR_DIGIT_FIXES)
+    amounts = []
+    for match in VN_NUMBER_RE.finditer(text):
+        value = parse_vn_number(match.group(2))
+        if value is not None:
+            amounts.append(-value if match.group(1) and match.group(3) else value)
+    return amounts
+
+
+def file_content_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_pages(file_path: str) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Stream an OCR'd text file page by page.
+
+    Args:
+        file_path: Path to a '--- Page N ---' delimited text file
+
+    Yields:
+        Tuples of (page_number, list of stripped lines on that page)
+    """
+    page_number = 0
+    lines: List[str] = []
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        for raw_line in f:
+            marker = PAGE_MARKER_RE.match(raw_line.strip())
+            if marker:
+                if page_number or lines:
+                    yield page_number, lines
+                page_number = int(marker.group(1))
+                lines = []
+            else:
+                lines.append(raw_line.strip())
+    if page_number or lines:
+        yield page_number, lines
+
+
+def detect_section(lines: List[str]) -> Optional[str]:
+    """
+    Find the statement header on a page.
+
+    Returns:
+        'balance_sheet', 'income_statement', 'cash_flow', 'notes' or None
+    """
+    for line in lines:
+        folded = fold_accents(line)
+        for section, pattern in SECTION_PATTERNS.items():
+            if pattern.search(folded):
+                return section
+        if NOTES_PATTERN.search(folded):
+            return 'notes'
+    return None
+
+
+def _collect_labels(lines: List[str], section: Optional[str] = None) -> List[str]:
+    """Gather label lines, merging OCR line-wraps into the preceding label."""
+    labels: List[str] = []
+    for line in lines:
+        if not line or extract_amounts(line):
+            continue
+        if fold_accents(line).upper() in COLUMN_HEADERS or line.endswith(':'):
+            continue
+        if section == 'cash_flow' and ROMAN_HEADING_RE.match(line):
+            continue
+        is_continuation = line[0].islower() or FORMULA_LINE_RE.match(line)
+        if is_continuation and labels:
+            labels[-1] = f"{labels[-1]} {line}"
+        else:
+            labels.append(line)
+    return labels
+
+
+def parse_page_line_items(lines: List[str], section: Optional[str] = None) -> List[Dict]:
+    """
+    Extract line items from one statement page.
+
+    Handles both OCR layouts: rows printed inline ("label code [note] current prior")
+    and column layouts where labels, codes and each amount column appear as
+    separate blocks. Each period date line ("30/06/2025") starts a new amount
+    column, so current and prior amounts come from their own blocks. Column rows
+    are aligned by position; 'aligned' is False when a block's size differs from
+    the number of codes and the pairing should not be trusted.
+
+    Inline rows printed as "label code" with their amounts further down the page
+    (typically the closing cash rows) take the page's trailing amounts, and an
+    unreadable comparative keeps the current amount with 'aligned' False. Lines
+    after the signature block (preparer, chief accountant, names) are ignored.
+
+    Args:
+        lines: Stripped lines of a single page
+        section: Statement the page belongs to, used for label clean-up
+
+    Returns:
+        List of dicts with keys: code, label, note, current, prior, layout, aligned
+    """
+    items = []
+    label_lines: List[str] = []
+    pending: List[Dict] = []
+    codes: List[str] = []
+    amounts: List[int] = []
+    column_starts: List[int] = []
+    in_code_block = False
+    in_signature = False
+    previous_text = None
+
+    for line in lines:
+        if not line:
+            continue
+
+        inline = INLINE_ROW_RE.match(line)
+        if inline:
+            values = inline.group('values')
+            if NUMERIC_LINE_RE.match(values):
+                values = values.translate(OCR_DIGIT_FIXES)
+            row_amounts = extract_amounts(values)
+            residue = VN_NUMBER_RE.sub('', values)
+            garbled = False
+            if VALUE_RESIDUE_RE.search(residue) and row_amounts and GARBLED_AMOUNT_RE.match(residue):
+                # Keep the current amount when only the comparative is unreadable
+                first = VN_NUMBER_RE.match(values)
+                garbled = first is not None and not VALUE_RESIDUE_RE.search(values[first.end():first.end() + 1])
+            if (row_amounts or NIL_VALUE_RE.search(values)) and (garbled or not VALUE_RESIDUE_RE.search(residue)):
+                # "-" marks a nil balance in the printed statements
+                row_amounts = row_amounts or [0, 0]
+                label = inline.group('label').strip()
+                if FORMULA_LABEL_RE.match(label) and previous_text:
+                    label = f"{previous_text} {label}"
+                items.append({
+                    'code': inline.group('code'),
+                    'label': label,
+                    'note': inline.group('note'),
+                    'current': row_amounts[0],
+                    'prior': row_amounts[1] if len(row_amounts) > 1 and not garbled else None,
+                    'layout': 'inline',
+                    'aligned': not garbled,
+                })
+                previous_text = None
+                continue
+
+        if SIGNATURE_RE.search(fold_accents(line).upper()):
+            in_signature = True
+
+        if CODE_HEADER_RE.match(line):
+            in_code_block = True
+            continue
+
+        if line == 'TM':
+            in_code_block = False
+            continue
+        if in_code_block and CODE_TOKEN_RE.match(line) and not line.startswith('V'):
+            codes.append(line)
+            continue
+        if codes and PERIOD_HEADER_RE.match(line):
+            in_code_block = False
+            column_starts.append(len(amounts))
+            continue
+
+        line_amounts = extract_amounts(line)
+        if line_amounts:
+            in_code_block = False
+            amounts.extend(line_amounts)
+        elif in_signature:
+            continue
+        elif not in_code_block and not codes:
+            pending_row = PENDING_ROW_RE.match(line)
+            if pending_row and items:
+                pending.append({'code': pending_row.group('code'), 'label': pending_row.group('label').strip()})
+            elif FORMULA_LINE_RE.match(line) and pending:
+                pending[-1]['label'] = f"{pending[-1]['label']} {line}"
+            else:
+                label_lines.append(line)
+                previous_text = line
+
+    if pending and not codes and amounts:
+        # Amounts of rows printed without values come last on the page: the first
+        # len(pending) are current-period amounts, the last len(pending) comparatives
+        n_pending = len(pending)
+        aligned = len(amounts) == 2 * n_pending
+        for i, row in enumerate(pending):
+            items.append({
+                'code': row['code'],
+                'label': row['label'],
+                'note': None,
+                'current': amounts[i] if i < len(amounts) else None,
+                'prior': amounts[len(amounts) - n_pending + i] if len(amounts) > n_pending else None,
+                'layout': 'inline',
+                'aligned': aligned,
+            })
+
+    if codes:
+        n_codes = len(codes)
+        labels = _collect_labels(label_lines, section)[-n_codes:]
+        labels = [None] * (n_codes - len(labels)) + labels
+        bounds = sorted({0, len(amounts), *column_starts})
+        blocks = [amounts[start:end] for start, end in zip(bounds, bounds[1:]) if end > start]
+        if len(blocks) >= 2:
+            # A nil or unreadable amount only shortens its own column
+            current, prior = blocks[0], blocks[1]
+            aligned = len(labels) == n_codes and len(current) == n_codes and len(prior) == n_codes
+        else:
+            current = amounts[:n_codes]
+            prior = amounts[n_codes:2 * n_codes]
+            aligned = len(labels) == n_codes and len(amounts) in (n_codes, 2 * n_codes)
+        for i, code in enumerate(codes):
+            items.append({
+                'code': code,
+                'label': labels[i],
+                'note': None,
+                'current': current[i] if i < len(current) else None,
+                'prior': prior[i] if i < len(prior) else None,
+                'layout': 'column',
+                'aligned': aligned,
+            })
+
+    return items
+
+
+def _parse_file(file_path: str) -> pd.DataFrame:
+    """Stream a statement file and build the typed line-item table."""
+    records = []
+    current_section = None
+    found_sections = set()
+
+    for page_number, lines in iter_pages(file_path):
+        section = detect_section(lines)
+        if section is not None:
+            current_section = section
+            found_sections.add(section)
+        # Continuation pages ("tiếp theo") inherit the previous section
+        if current_section in (None, 'notes'):
+            continue
+        for item in parse_page_line_items(lines, current_section):
+            item['section'] = current_section
+            item['page'] = page_number
+            records.append(item)
+
+    columns = ['section', 'page', 'code', 'label', 'note', 'current', 'prior', 'layout', 'aligned']
+    df = pd.DataFrame.from_records(records, columns=columns)
+    df = df.astype({
+        'section': pd.CategoricalDtype(list(SECTION_PATTERNS.keys())),
+        'page': 'int16',
+        'code': 'string',
+        'label': 'string',
+        'note': 'string',
+        'current': 'Int64',
+        'prior': 'Int64',
+        'layout': pd.CategoricalDtype(['inline', 'column']),
+        'aligned': 'bool',
+    })
+
+    # A statement whose header was never recognised (e.g. a page OCR'd upside down)
+    # would otherwise just be absent from the table
+    df.attrs['missing_sections'] = [section for section in SECTION_PATTERNS if section not in found_sections]
+    if df.attrs['missing_sections']:
+        logger.warning("%s: no %s found", file_path, ', '.join(df.attrs['missing_sections']))
+    return df
+
+
+def parse_financial_statements(file_path: str, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Parse an OCR'd Vietnamese financial statement (BCTC) into a typed line-item table.
+
+    Args:
+        file_path: Path to a '*_ocr_extracted*.txt' file
+        use_cache: Reuse a previous parse of a file with identical content
+
+    Returns:
+        DataFrame with columns:
+        - section: 'balance_sheet', 'income_statement' or 'cash_flow'
+        - page: Source page number
+        - code: Line item code (mã số) as printed
+        - label: Line item description, if it could be recovered
+        - note: Reference to the notes (thuyết minh), if printed inline
+        - current: Amount for the reporting period (VND)
+        - prior: Comparative amount (VND)
+        - layout: 'inline' or 'column' OCR layout the row was read from
+        - aligned: False when column blocks had mismatched sizes, or an inline row
+          had amounts printed apart from it or partly unreadable
+        df.attrs['missing_sections'] lists the statements whose header was not found.
+    """
+    content_hash = file_content_hash(file_path)
+    if use_cache and content_hash in _PARSE_CACHE:
+        return _PARSE_CACHE[content_hash].copy()
+
+    df = _parse_file(file_path)
+    if use_cache:
+        _PARSE_CACHE[content_hash] = df
+    return df.copy()
+
+
+def clear_parse_cache() -> None:
+    """Drop all cached parse results."""
+    _PARSE_CACHE.clear()
+
+
+# Example usage
+if __name__ == "__main__":
+    statements = parse_financial_statements('data/2_ HDG_ BCTC hop nhat 6T 2025.pdf_ocr_extracted-2.txt')
+
+    pd.options.display.float_format = '{:,.0f}'.format
+    print("Missing sections:", statements.attrs['missing_sections'])
+    for section, items in statements.groupby('section', observed=True):
+        print(f"\n{section}: {len(items)} line items")
+        print(items.head(15).to_string(index=False))
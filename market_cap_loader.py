@@ -0,0 +1,179 @@
+#%%
+import os
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+DEFAULT_MKTCAP_PATH = os.path.join('data', 'MktCap_processed.parquet')
+
+TICKER_COLUMN = 'TICKER'
+DATE_COLUMN = 'TRADE_DATE'
+VALUE_COLUMN = 'CUR_MKT_CAP'
+
+DateLike = Union[str, date, datetime, pd.Timestamp]
+
+# Process-wide dataset handles, keyed by path and invalidated when the file changes
+_DATASET_CACHE: Dict[str, Tuple[float, ds.Dataset]] = {}
+
+
+def get_dataset(path: str = DEFAULT_MKTCAP_PATH) -> ds.Dataset:
+    """
+    Return a cached pyarrow dataset handle for a market-cap parquet file.
+
+    Opening the handle only reads the parquet footer (schema and row-group
+    statistics); data is read lazily by `load_market_cap`.
+
+    Args:
+        path: Path to the parquet file (or directory of parquet files)
+
+    Returns:
+        pyarrow Dataset
+    """
+    mtime = os.path.getmtime(path)
+    cached = _DATASET_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    dataset = ds.dataset(path, format='parquet')
+    _DATASET_CACHE[path] = (mtime, dataset)
+    return dataset
+
+
+def clear_dataset_cache() -> None:
+    """Drop all cached dataset handles."""
+    _DATASET_CACHE.clear()
+
+
+def _build_filter(
+    dataset: ds.Dataset,
+    tickers: Optional[Iterable[str]],
+    start_date: Optional[DateLike],
+    end_date: Optional[DateLike]
+) -> Optional[ds.Expression]:
+    """Combine ticker and date predicates into one pushdown expression."""
+    expression = None
+    if tickers is not None:
+        expression = ds.field(TICKER_COLUMN).isin(list(tickers))
+
+    date_type = dataset.schema.field(DATE_COLUMN).type
+    for bound, op in ((start_date, '>='), (end_date, '<=')):
+        if bound is None:
+            continue
+        scalar = pa.scalar(pd.Timestamp(bound).to_pydatetime(), type=date_type)
+        predicate = ds.field(DATE_COLUMN) >= scalar if op == '>=' else ds.field(DATE_COLUMN) <= scalar
+        expression = predicate if expression is None else expression & predicate
+
+    return expression
+
+
+def _compact_dtypes(df: pd.DataFrame, float_rtol: float = 1e-6) -> pd.DataFrame:
+    """
+    Shrink column dtypes: categorical tickers and float32 where it is lossless enough.
+
+    A float64 column is only downcast when every value survives the round trip to
+    float32 within `float_rtol` relative error.
+    """
+    if TICKER_COLUMN in df.columns:
+        df[TICKER_COLUMN] = df[TICKER_COLUMN].astype('category')
+
+    for column in df.select_dtypes(include=['float64']).columns:
+        values = df[column].to_numpy()
+        finite = values[np.isfinite(values)]
+        if finite.size and np.abs(finite).max() >= np.finfo(np.float32).max:
+            continue
+        downcast = values.astype(np.float32)
+        if np.allclose(values, downcast, rtol=float_rtol, atol=0.0, equal_nan=True):
+            df[column] = downcast
+
+    return df
+
+
+def load_market_cap(
+    tickers: Optional[Union[str, Iterable[str]]] = None,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    columns: Optional[List[str]] = None,
+    path: str = DEFAULT_MKTCAP_PATH,
+    compact: bool = True
+) -> pd.DataFrame:
+    """
+    Load market-cap history, reading only the requested columns and rows.
+
+    Ticker and date filters are pushed down to the parquet reader, so row groups
+    whose statistics fall outside the range are skipped without being decoded.
+
+    Args:
+        tickers: A ticker or list of tickers (None for all)
+        start_date: Inclusive lower bound on TRADE_DATE
+        end_date: Inclusive upper bound on TRADE_DATE
+        columns: Columns to return (defaults to all)
+        path: Path to the parquet file
+        compact: Use categorical tickers and float32 values where safe
+
+    Returns:
+        DataFrame with the requested columns, sorted by ticker and date when present
+    """
+    if isinstance(tickers, str):
+        tickers = [tickers]
+
+    dataset = get_dataset(path)
+    expression = _build_filter(dataset, tickers, start_date, end_date)
+    table = dataset.to_table(columns=columns, filter=expression)
+
+    if compact and TICKER_COLUMN in table.column_names:
+        # Dictionary-encode before conversion so pandas builds a categorical directly
+        index = table.column_names.index(TICKER_COLUMN)
+        table = table.set_column(index, TICKER_COLUMN, pc.dictionary_encode(table[TICKER_COLUMN]))
+
+    df = table.to_pandas()
+    if compact:
+        df = _compact_dtypes(df)
+
+    sort_columns = [c for c in (TICKER_COLUMN, DATE_COLUMN) if c in df.columns]
+    if sort_columns:
+        df = df.sort_values(sort_columns, ignore_index=True)
+    return df
+
+
+def get_market_cap(
+    ticker: str,
+    as_of: Optional[DateLike] = None,
+    path: str = DEFAULT_MKTCAP_PATH
+) -> Optional[float]:
+    """
+    Latest market cap for a ticker on or before a date.
+
+    Args:
+        ticker: Stock ticker (e.g. 'HDG')
+        as_of: Cut-off date (defaults to the latest available)
+        path: Path to the parquet file
+
+    Returns:
+        Market cap (VND bn), or None if the ticker has no data
+    """
+    df = load_market_cap(
+        tickers=[ticker],
+        end_date=as_of,
+        columns=[DATE_COLUMN, VALUE_COLUMN],
+        path=path
+    )
+    df = df.dropna(subset=[VALUE_COLUMN])
+    if df.empty:
+        return None
+    return float(df.loc[df[DATE_COLUMN].idxmax(), VALUE_COLUMN])
+
+
+# Example usage
+if __name__ == "__main__":
+    compact = load_market_cap()
+    print(f"Loaded {len(compact):,} rows ({compact.memory_usage(deep=True).sum():,} bytes)")
+    print(compact.dtypes)
+
+    print("\nHDG / DXS:")
+    print(load_market_cap(tickers=['HDG', 'DXS']).to_string(index=False))
+    print(f"\nHDG market cap: {get_market_cap('HDG'):,.0f} VND bn")
@@ -0,0 +1,245 @@
+#%%
+import hashlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pytesseract
+from pdf2image import convert_from_path
+from PyPDF2 import PdfReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+# Default location for per-page OCR results, keyed by page content hash
+DEFAULT_CACHE_DIR = os.path.join('data', '.ocr_cache')
+
+# Vietnamese + English covers the BCTC filings (tesseract-ocr-vie / -eng packages)
+DEFAULT_LANG = 'vie+eng'
+DEFAULT_DPI = 300
+
+
+# Page attributes that change what is rendered, besides the content stream and resources
+PAGE_RENDER_KEYS = ('/MediaBox', '/CropBox', '/Rotate')
+
+
+def _hash_pdf_object(obj, digest, seen: set) -> None:
+    """Feed a PDF object into `digest`, following references and hashing raw stream bytes."""
+    if isinstance(obj, IndirectObject):
+        key = (obj.idnum, obj.generation)
+        if key in seen:
+            digest.update(b'<seen>')
+            return
+        seen.add(key)
+        obj = obj.get_object()
+
+    if isinstance(obj, DictionaryObject):
+        digest.update(b'<<')
+        for key in sorted(obj):
+            digest.update(str(key).encode('utf-8'))
+            _hash_pdf_object(obj.raw_get(key), digest, seen)
+        digest.update(b'>>')
+        if isinstance(obj, StreamObject):
+            # Encoded bytes: no decoding needed and stable for a given scan
+            digest.update(obj._data)
+    elif isinstance(obj, ArrayObject):
+        digest.update(b'[')
+        for item in obj:
+            _hash_pdf_object(item, digest, seen)
+        digest.update(b']')
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+
+
+def page_content_hashes(pdf_path: str) -> List[str]:
+    """
+    SHA-256 of each page's own content, in page order.
+
+    A page's hash covers its content stream, the resources it draws (fonts and, for
+    scanned filings, the page image) and its box/rotation, but not the rest of the
+    file, so re-issuing or editing one page leaves every other page's key unchanged.
+
+    Args:
+        pdf_path: Path to the PDF
+
+    Returns:
+        List of hex digests, one per page
+    """
+    reader = PdfReader(pdf_path)
+    hashes = []
+    for page in reader.pages:
+        digest = hashlib.sha256()
+        seen = set()
+        for key in ('/Contents', '/Resources') + PAGE_RENDER_KEYS:
+            digest.update(key.encode('utf-8'))
+            if key in page:
+                _hash_pdf_object(page.raw_get(key), digest, seen)
+        hashes.append(digest.hexdigest())
+    return hashes
+
+
+def _page_cache_path(cache_dir: str, page_hash: str, lang: str, dpi: int) -> str:
+    """Path of the cached text for one page; OCR settings are part of the key."""
+    return os.path.join(cache_dir, f"{lang}_{dpi}", f"{page_hash}.txt")
+
+
+def _read_cached_page(cache_path: str) -> Optional[str]:
+    """Return cached page text, or None if the page has not been OCR'd yet."""
+    if not os.path.exists(cache_path):
+        return None
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _write_cached_page(cache_path: str, text: str) -> None:
+    """Write page text atomically so an interrupted run never leaves a partial page."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, cache_path)
+
+
+def ocr_page(pdf_path: str, page_number: int, lang: str = DEFAULT_LANG, dpi: int = DEFAULT_DPI) -> str:
+    """
+    Rasterise and recognise a single PDF page.
+
+    Only the requested page is rendered, so a worker holds at most one page image.
+
+    Args:
+        pdf_path: Path to the PDF
+        page_number: 1-based page number
+        lang: Tesseract language codes
+        dpi: Rasterisation resolution
+
+    Returns:
+        Recognised text of the page
+    """
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    try:
+        return pytesseract.image_to_string(images[0], lang=lang) if images else ''
+    finally:
+        for image in images:
+            image.close()
+
+
+def _ocr_page_task(pdf_path: str, page_number: int, lang: str, dpi: int, cache_path: str) -> Tuple[int, str]:
+    """Worker entry point: OCR one page and persist it to the cache."""
+    text = ocr_page(pdf_path, page_number, lang=lang, dpi=dpi)
+    _write_cached_page(cache_path, text)
+    return page_number, text
+
+
+def iter_ocr_pages(
+    pdf_path: str,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    lang: str = DEFAULT_LANG,
+    dpi: int = DEFAULT_DPI,
+    max_workers: Optional[int] = None,
+    max_pending: Optional[int] = None
+) -> Iterator[Tuple[int, str]]:
+    """
+    OCR a PDF across a process pool, yielding page texts in page order.
+
+    Pages are cached by their own content (see page_content_hashes), so pages already
+    OCR'd - in this file or an earlier issue of it - are read back without re-running
+    tesseract and a changed page only re-OCRs that page. At most
+    `max_pending` pages are in flight at once, which bounds the number of page
+    images held in memory regardless of document length.
+
+    Args:
+        pdf_path: Path to the PDF
+        cache_dir: Directory for per-page results
+        lang: Tesseract language codes
+        dpi: Rasterisation resolution
+        max_workers: Number of worker processes (defaults to CPU count)
+        max_pending: Maximum pages submitted but not yet yielded (defaults to 2 x workers)
+
+    Yields:
+        Tuples of (page_number, text)
+    """
+    page_hashes = page_content_hashes(pdf_path)
+    n_pages = len(page_hashes)
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * max_workers
+
+    completed: Dict[int, str] = {}
+    next_to_yield = 1
+    next_to_submit = 1
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+
+        while next_to_yield <= n_pages:
+            # Top up the pool; cached pages are resolved inline without a worker
+            while next_to_submit <= n_pages and len(pending) + len(completed) < max_pending:
+                cache_path = _page_cache_path(cache_dir, page_hashes[next_to_submit - 1], lang, dpi)
+                cached_text = _read_cached_page(cache_path)
+                if cached_text is not None:
+                    completed[next_to_submit] = cached_text
+                else:
+                    pending.add(executor.submit(
+                        _ocr_page_task, pdf_path, next_to_submit, lang, dpi, cache_path
+                    ))
+                next_to_submit += 1
+
+            # Yield every page that is ready in order
+            if next_to_yield in completed:
+                while next_to_yield in completed:
+                    yield next_to_yield, completed.pop(next_to_yield)
+                    next_to_yield += 1
+                continue
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page_number, text = future.result()
+                completed[page_number] = text
+
+
+def ocr_pdf_to_text(
+    pdf_path: str,
+    output_path: Optional[str] = None,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    lang: str = DEFAULT_LANG,
+    dpi: int = DEFAULT_DPI,
+    max_workers: Optional[int] = None
+) -> str:
+    """
+    OCR a PDF into the project's '--- Page N ---' text format.
+
+    Pages are streamed to the output file as they complete, so an interrupted run
+    keeps its finished pages in the cache and the next run only OCRs the rest.
+
+    Args:
+        pdf_path: Path to the PDF
+        output_path: Destination text file (defaults to '<pdf>_ocr_extracted.txt')
+        cache_dir: Directory for per-page results
+        lang: Tesseract language codes
+        dpi: Rasterisation resolution
+        max_workers: Number of worker processes (defaults to CPU count)
+
+    Returns:
+        Path of the written text file
+    """
+    if output_path is None:
+        output_path = f"{pdf_path}_ocr_extracted.txt"
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for page_number, text in iter_ocr_pages(
+            pdf_path, cache_dir=cache_dir, lang=lang, dpi=dpi, max_workers=max_workers
+        ):
+            f.write(f"\n--- Page {page_number} ---\n{text.strip()}\n")
+    os.replace(tmp_path, output_path)
+
+    return output_path
+
+
+# Example usage
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python ocr_pipeline.py <file.pdf> [output.txt]")
+        sys.exit(1)
+
+    output = ocr_pdf_to_text(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"OCR text written to {output}")
@@ -0,0 +1,330 @@
+#%%
+import hashlib
+import itertools
+import json
+import os
+import shutil
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from balance_sheet_manager import BALANCE_COLUMNS, generate_simplified_schedules_batch
+
+DEFAULT_OUTPUT_DIR = os.path.join('data', 'portfolio_runs', 'default')
+DEFAULT_CHUNK_SIZE = 500
+
+MANIFEST_FILE = 'manifest.json'
+DATA_DIR = 'schedules'
+PARTITION_COLUMNS = ['ticker', 'scenario']
+KEY_COLUMNS = PARTITION_COLUMNS + ['project', 'Year']
+
+
+def expand_scenarios(
+    projects: Iterable[Dict],
+    scenarios: Dict[str, Dict]
+) -> Iterator[Dict]:
+    """
+    Cross project specs with scenario overrides, lazily.
+
+    Args:
+        projects: Iterable of {'ticker': str, 'project': str, 'params': {...}} where params
+            are keyword arguments for generate_simplified_balance_sheet_schedules
+        scenarios: {scenario_name: parameter overrides}, e.g.
+            {'base': {}, 'rates +200bp': {'interest_rate': 0.11}}
+
+    Yields:
+        Run specs {'ticker', 'project', 'scenario', 'params'}
+    """
+    for project in projects:
+        for name, overrides in scenarios.items():
+            yield {
+                'ticker': project['ticker'],
+                'project': project['project'],
+                'scenario': name,
+                'params': {**project['params'], **overrides},
+            }
+
+
+def _chunk_hash(specs: List[Dict]) -> str:
+    """Fingerprint of a chunk's specs, used to check that a resumed run sees the same input."""
+    payload = json.dumps(specs, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _read_manifest(output_dir: str) -> Optional[Dict]:
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_manifest(output_dir: str, manifest: Dict) -> None:
+    """Replace the manifest atomically so an interrupted run never leaves it half-written."""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _chunk_table(specs: List[Dict]) -> pa.Table:
+    """Run one chunk through the batched engine and flatten it to a long table."""
+    schedules = generate_simplified_schedules_batch([spec['params'] for spec in specs])
+
+    lengths = np.array([len(schedule['Year']) for schedule in schedules])
+    columns = {
+        'ticker': np.repeat([str(spec['ticker']) for spec in specs], lengths),
+        'scenario': np.repeat([str(spec['scenario']) for spec in specs], lengths),
+        'project': np.repeat([str(spec['project']) for spec in specs], lengths),
+        'Year': np.concatenate([schedule['Year'] for schedule in schedules]).astype(np.int32),
+    }
+    for column in schedules[0]:
+        if column != 'Year':
+            columns[column] = np.concatenate([schedule[column] for schedule in schedules])
+    return pa.table(columns)
+
+
+def run_portfolio(
+    specs: Iterable[Dict],
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    resume: bool = True
+) -> Dict:
+    """
+    Stream run specs through the schedule engine in bounded chunks into a partitioned
+    Parquet dataset (hive-partitioned by ticker and scenario) with a JSON manifest.
+
+    Only one chunk of specs and schedules is held in memory at a time, so `specs` can
+    be a generator over the whole universe (see expand_scenarios). After each chunk
+    is written the manifest records it as complete; rerunning with the same specs
+    skips the completed chunks and continues from the next one. Chunk files have
+    deterministic names, so a chunk interrupted mid-write is simply overwritten.
+
+    Args:
+        specs: Iterable of {'ticker', 'project', 'scenario', 'params'}
+        output_dir: Run directory (manifest.json plus the schedules/ dataset)
+        chunk_size: Specs per batched engine call and per written chunk
+        resume: Continue a previous run in output_dir; if False its manifest and
+            schedules are deleted and the run starts over
+
+    Returns:
+        The manifest: chunk_size, completed chunks (index, specs, rows, hash), totals
+        and a 'complete' flag
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    data_dir = os.path.join(output_dir, DATA_DIR)
+
+    if not resume and os.path.isdir(data_dir):
+        # Chunk files of the old run would otherwise survive in partitions this run never writes
+        shutil.rmtree(data_dir)
+    manifest = _read_manifest(output_dir) if resume else None
+    if manifest is not None and manifest['chunk_size'] != chunk_size:
+        raise ValueError(
+            f"Run in {output_dir} used chunk_size={manifest['chunk_size']}; resume with the same chunk size"
+        )
+    if manifest is None:
+        manifest = {
+            'chunk_size': chunk_size,
+            'partitioning': PARTITION_COLUMNS,
+            'data_dir': DATA_DIR,
+            'chunks': [],
+            'n_specs': 0,
+            'n_rows': 0,
+            'complete': False,
+        }
+        _write_manifest(output_dir, manifest)
+
+    completed = {chunk['index']: chunk for chunk in manifest['chunks']}
+    spec_iter = iter(specs)
+    for index in itertools.count():
+        chunk = list(itertools.islice(spec_iter, chunk_size))
+        if not chunk:
+            break
+
+        chunk_hash = _chunk_hash(chunk)
+        if index in completed:
+            if completed[index]['hash'] != chunk_hash:
+                raise ValueError(f"Chunk {index} differs from the completed run in {output_dir}")
+            continue
+
+        table = _chunk_table(chunk)
+        ds.write_dataset(
+            table,
+            data_dir,
+            format='parquet',
+            partitioning=PARTITION_COLUMNS,
+            partitioning_flavor='hive',
+            basename_template=f"chunk-{index:06d}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
+        )
+
+        manifest['chunks'].append({
+            'index': index, 'n_specs': len(chunk), 'n_rows': table.num_rows, 'hash': chunk_hash
+        })
+        manifest['n_specs'] += len(chunk)
+        manifest['n_rows'] += table.num_rows
+        _write_manifest(output_dir, manifest)
+
+    manifest['complete'] = True
+    _write_manifest(output_dir, manifest)
+    return manifest
+
+
+def open_portfolio_dataset(output_dir: str = DEFAULT_OUTPUT_DIR) -> ds.Dataset:
+    """
+    Lazy handle on a run's schedules; nothing is read until it is scanned.
+
+    Args:
+        output_dir: Run directory written by run_portfolio
+
+    Returns:
+        pyarrow Dataset with ticker and scenario as partition columns
+    """
+    return ds.dataset(os.path.join(output_dir, DATA_DIR), format='parquet', partitioning='hive')
+
+
+def _portfolio_filter(
+    tickers: Optional[Sequence[str]],
+    scenarios: Optional[Sequence[str]]
+) -> Optional[ds.Expression]:
+    """Partition predicates, so unselected ticker/scenario directories are never opened."""
+    expression = None
+    for column, values in (('ticker', tickers), ('scenario', scenarios)):
+        if values is None:
+            continue
+        predicate = ds.field(column).isin(list(values))
+        expression = predicate if expression is None else expression & predicate
+    return expression
+
+
+def load_portfolio_schedules(
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    tickers: Optional[Union[str, Sequence[str]]] = None,
+    scenarios: Optional[Union[str, Sequence[str]]] = None,
+    columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Read a slice of a run's schedules into memory.
+
+    Args:
+        output_dir: Run directory written by run_portfolio
+        tickers: A ticker or list of tickers (None for all)
+        scenarios: A scenario or list of scenarios (None for all)
+        columns: Schedule columns to read in addition to the key columns (None for all)
+
+    Returns:
+        Long DataFrame with ticker, scenario, project, Year and the schedule columns
+    """
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    if isinstance(scenarios, str):
+        scenarios = [scenarios]
+
+    dataset = open_portfolio_dataset(output_dir)
+    read_columns = None if columns is None else KEY_COLUMNS + [c for c in columns if c not in KEY_COLUMNS]
+    table = dataset.to_table(columns=read_columns, filter=_portfolio_filter(tickers, scenarios))
+    return table.to_pandas().sort_values(KEY_COLUMNS, ignore_index=True)
+
+
+def aggregate_portfolio(
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    columns: Sequence[str] = ('PAT', 'Cumulative_Cash_Balance', 'Debt_Balance'),
+    tickers: Optional[Sequence[str]] = None,
+    scenarios: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """
+    Sum schedule columns across projects by ticker, scenario and year, reading the
+    dataset one file (one chunk of one ticker/scenario partition) at a time so memory
+    is bounded by the chunk size and the aggregate, not the run.
+
+    Flow columns are summed by year. Balance columns (BALANCE_COLUMNS) are summed as
+    year-on-year changes and cumulated, so a project that has ended keeps its final
+    balance in every later year of its ticker and scenario.
+
+    Args:
+        output_dir: Run directory written by run_portfolio
+        columns: Schedule columns to sum
+        tickers: Restrict to these tickers (None for all)
+        scenarios: Restrict to these scenarios (None for all)
+
+    Returns:
+        DataFrame indexed by (ticker, scenario, Year) with one column per summed column
+    """
+    columns = list(columns)
+    balances = [column for column in columns if column in BALANCE_COLUMNS]
+    group_columns = ['ticker', 'scenario', 'Year']
+    dataset = open_portfolio_dataset(output_dir)
+
+    partials = []
+    # A spec's rows are written to a single file, so each project is complete within a fragment
+    for fragment in dataset.get_fragments(filter=_portfolio_filter(tickers, scenarios)):
+        frame = fragment.to_table(schema=dataset.schema, columns=group_columns + ['project'] + columns).to_pandas()
+        if frame.empty:
+            continue
+        if balances:
+            frame = frame.sort_values(['project', 'Year'], kind='stable')
+            frame[balances] = frame.groupby('project')[balances].diff().fillna(frame[balances])
+        partials.append(frame.groupby(group_columns, observed=True)[columns].sum())
+        # Fold partial sums periodically so the list never grows with the run
+        if len(partials) >= 64:
+            partials = [pd.concat(partials).groupby(level=group_columns).sum()]
+
+    if not partials:
+        return pd.DataFrame(columns=columns, index=pd.MultiIndex.from_tuples([], names=group_columns))
+    totals = pd.concat(partials).groupby(level=group_columns).sum().sort_index()
+    if balances:
+        totals[balances] = totals[balances].groupby(level=['ticker', 'scenario']).cumsum()
+    return totals
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    def example_projects(n_tickers: int, projects_per_ticker: int):
+        for t in range(n_tickers):
+            for p in range(projects_per_ticker):
+                yield {
+                    'ticker': f"DEV{t:03d}",
+                    'project': f"P{p:02d}",
+                    'params': dict(
+                        total_debt=1000000000 * (1 + p % 3),
+                        total_construction_cost=800000000,
+                        total_land_cost=300000000,
+                        land_payment_year=2024,
+                        total_revenue=1500000000 + 10000000 * t,
+                        interest_rate=0.08,
+                        sga_percentage=0.05,
+                        construction_start_year=2024,
+                        construction_end_year=2026 + p % 2,
+                        sales_start_year=2025,
+                        sales_end_year=2027,
+                        debt_repayment_start_year=2027,
+                        debt_repayment_end_year=2028 + p % 2,
+                        revenue_booking_start_year=2027,
+                        revenue_booking_end_year=2028 + p % 2,
+                        presales_distribution={'2025': 30, '2026': 50, '2027': 20}
+                    ),
+                }
+
+    scenarios = {
+        'base': {},
+        'rates +200bp': {'interest_rate': 0.10},
+        'slow sales': {'presales_distribution': {'2025': 10, '2026': 40, '2027': 50}},
+    }
+
+    start = time.perf_counter()
+    manifest = run_portfolio(
+        expand_scenarios(example_projects(50, 20), scenarios),
+        output_dir=os.path.join('data', 'portfolio_runs', 'example'),
+        chunk_size=1000
+    )
+    print(f"{manifest['n_specs']:,} runs, {manifest['n_rows']:,} rows in {len(manifest['chunks'])} chunks "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    totals = aggregate_portfolio(os.path.join('data', 'portfolio_runs', 'example'), tickers=['DEV000', 'DEV001'])
+    print(totals.round(0))
@@ -0,0 +1,211 @@
+#%%
+import os
+import re
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from market_cap_loader import DATE_COLUMN, TICKER_COLUMN, VALUE_COLUMN, load_market_cap
+
+DEFAULT_MOC_PATH = os.path.join('data', 'MoC_Data.csv')
+
+# MoC column labels look like '3Q19' (quarter 3 of 2019)
+QUARTER_LABEL_RE = re.compile(r'^([1-4])Q(\d{2})$')
+
+# Section header rows in MoC_Data.csv repeat the quarter labels instead of values
+MOC_SECTIONS = {
+    'Tổng lượng giao dịch bất động sản': 'transaction_volume',
+    'Dư nợ tín dụng kinh doanh bất động sản': 'credit_outstanding',
+    'Tồn kho bất động sản': 'inventory',
+    'Dự án đầu tư xây dựng hạ tầng để chuyển nhượng quyền sử dụng đất xây dựng nhà ở': 'infrastructure_projects',
+}
+
+
+def parse_quarter_label(label: str) -> Optional[pd.Period]:
+    """Convert a MoC quarter label (e.g. '3Q19') to a quarterly pandas Period."""
+    match = QUARTER_LABEL_RE.match(str(label).strip())
+    if not match:
+        return None
+    return pd.Period(year=2000 + int(match.group(2)), quarter=int(match.group(1)), freq='Q')
+
+
+def quarter_label(period: pd.Period) -> str:
+    """Convert a quarterly Period back to the MoC label format (e.g. '3Q19')."""
+    return f"{period.quarter}Q{period.year % 100:02d}"
+
+
+def build_quarter_index(*period_sets: Sequence[pd.Period]) -> pd.PeriodIndex:
+    """
+    Shared, gap-free quarterly index covering every period passed in.
+
+    Args:
+        *period_sets: Collections of quarterly Periods (e.g. market-cap and MoC quarters)
+
+    Returns:
+        PeriodIndex with freq 'Q' from the earliest to the latest quarter
+    """
+    periods = [p for periods in period_sets for p in periods if p is not None and not pd.isna(p)]
+    if not periods:
+        return pd.PeriodIndex([], freq='Q')
+    return pd.period_range(min(periods), max(periods), freq='Q')
+
+
+def load_moc_quarterly(path: str = DEFAULT_MOC_PATH) -> pd.DataFrame:
+    """
+    Load MoC_Data.csv as a numeric indicator x quarter table.
+
+    Indicators are named '<section>:<metric>' using the same section names as the
+    MongoDB collections. Repeated metric names within a section (the project scale
+    block reuses 'Hoàn thành', 'Đang triển khai xây dựng', ...) get a ' (Quy mô)' suffix.
+
+    Args:
+        path: Path to MoC_Data.csv
+
+    Returns:
+        DataFrame indexed by indicator with a quarterly PeriodIndex as columns
+    """
+    raw = pd.read_csv(path, header=None, encoding='utf-8-sig', dtype=str)
+    quarter_columns = raw.columns[2:]
+    periods = [parse_quarter_label(label) for label in raw.iloc[0, 2:]]
+
+    rows = {}
+    section = None
+    seen_metrics = set()
+    for _, row in raw.iterrows():
+        metric = str(row[0]).strip()
+        if metric in MOC_SECTIONS:
+            section = MOC_SECTIONS[metric]
+            seen_metrics = set()
+            continue
+
+        name = metric if metric not in seen_metrics else f"{metric} (Quy mô)"
+        seen_metrics.add(metric)
+        values = pd.to_numeric(row[quarter_columns].str.strip(), errors='coerce').to_numpy(dtype=np.float64)
+        rows[f"{section}:{name}"] = values
+
+    moc = pd.DataFrame.from_dict(rows, orient='index', columns=pd.PeriodIndex(periods, freq='Q'))
+    moc.index.name = 'indicator'
+    return moc
+
+
+def resample_market_cap_quarterly(
+    mktcap: pd.DataFrame,
+    how: str = 'last'
+) -> pd.DataFrame:
+    """
+    Reduce daily/monthly market caps to one value per ticker and quarter.
+
+    A single vectorized groupby over (ticker, quarter) replaces per-ticker resampling.
+
+    Args:
+        mktcap: Long DataFrame with TICKER, TRADE_DATE and CUR_MKT_CAP columns
+        how: Reduction within the quarter: 'last' (quarter-end), 'mean', 'max' or 'min'
+
+    Returns:
+        DataFrame of tickers x quarterly PeriodIndex
+    """
+    quarters = mktcap[DATE_COLUMN].dt.to_period('Q')
+    frame = pd.DataFrame({
+        TICKER_COLUMN: mktcap[TICKER_COLUMN].astype(str).to_numpy(),
+        'quarter': quarters.to_numpy(),
+        DATE_COLUMN: mktcap[DATE_COLUMN].to_numpy(),
+        VALUE_COLUMN: mktcap[VALUE_COLUMN].astype(np.float64).to_numpy(),
+    })
+
+    if how == 'last':
+        # Quarter-end value: last non-null observation by trade date
+        frame = frame.dropna(subset=[VALUE_COLUMN]).sort_values(DATE_COLUMN, kind='stable')
+        reduced = frame.groupby([TICKER_COLUMN, 'quarter'], sort=True)[VALUE_COLUMN].last()
+    elif how in ('mean', 'max', 'min'):
+        reduced = frame.groupby([TICKER_COLUMN, 'quarter'], sort=True)[VALUE_COLUMN].agg(how)
+    else:
+        raise ValueError(f"Unsupported reduction: {how}")
+
+    wide = reduced.unstack('quarter')
+    wide.columns = pd.PeriodIndex(wide.columns, freq='Q')
+    return wide
+
+
+def build_quarterly_panel(
+    tickers: Optional[Sequence[str]] = None,
+    indicators: Optional[Sequence[str]] = None,
+    mktcap: Optional[pd.DataFrame] = None,
+    moc: Optional[pd.DataFrame] = None,
+    how: str = 'last'
+) -> Dict:
+    """
+    Align market caps with MoC quarterly series on a shared quarter index.
+
+    Args:
+        tickers: Tickers to include (defaults to all in the market-cap data)
+        indicators: MoC indicators to include (defaults to all)
+        mktcap: Long market-cap DataFrame (defaults to `load_market_cap`)
+        moc: Indicator x quarter table (defaults to `load_moc_quarterly`)
+        how: Quarterly reduction for market caps (see `resample_market_cap_quarterly`)
+
+    Returns:
+        Dict with:
+        - tickers: List of tickers (axis 0)
+        - quarters: List of MoC-style quarter labels (axis 1)
+        - indicators: ['market_cap'] + MoC indicator names (axis 2)
+        - market_cap: C-contiguous float64 array (tickers x quarters)
+        - macro: C-contiguous float64 array (quarters x MoC indicators)
+        - panel: C-contiguous float64 array (tickers x quarters x indicators),
+          market cap in channel 0 and the macro series broadcast across tickers
+        Missing observations are NaN.
+    """
+    if mktcap is None:
+        mktcap = load_market_cap(tickers=tickers)
+    if moc is None:
+        moc = load_moc_quarterly()
+    if indicators is not None:
+        moc = moc.loc[list(indicators)]
+
+    quarterly_mktcap = resample_market_cap_quarterly(mktcap, how=how)
+    if tickers is not None:
+        quarterly_mktcap = quarterly_mktcap.reindex(list(tickers))
+
+    quarter_index = build_quarter_index(quarterly_mktcap.columns, moc.columns)
+
+    market_cap = np.ascontiguousarray(
+        quarterly_mktcap.reindex(columns=quarter_index).to_numpy(dtype=np.float64)
+    )
+    macro = np.ascontiguousarray(
+        moc.reindex(columns=quarter_index).to_numpy(dtype=np.float64).T
+    )
+
+    n_tickers, n_quarters = market_cap.shape
+    panel = np.empty((n_tickers, n_quarters, 1 + macro.shape[1]), dtype=np.float64)
+    panel[:, :, 0] = market_cap
+    panel[:, :, 1:] = macro[np.newaxis, :, :]
+
+    return {
+        'tickers': [str(t) for t in quarterly_mktcap.index],
+        'quarters': [quarter_label(p) for p in quarter_index],
+        'indicators': ['market_cap'] + [str(i) for i in moc.index],
+        'market_cap': market_cap,
+        'macro': macro,
+        'panel': panel,
+    }
+
+
+def panel_to_frame(panel: Dict) -> pd.DataFrame:
+    """Flatten a quarterly panel to a long DataFrame (ticker, quarter) x indicators."""
+    index = pd.MultiIndex.from_product([panel['tickers'], panel['quarters']], names=['ticker', 'quarter'])
+    values = panel['panel'].reshape(-1, panel['panel'].shape[2])
+    return pd.DataFrame(values, index=index, columns=panel['indicators'])
+
+
+# Example usage
+if __name__ == "__main__":
+    moc = load_moc_quarterly()
+    print(f"MoC indicators: {len(moc)}")
+    print(moc.iloc[:4, -4:])
+
+    panel = build_quarterly_panel(
+        tickers=['HDG', 'DXS', 'NLG'],
+        indicators=['transaction_volume:Tổng lượng giao dịch', 'inventory:Tổng tồn kho bất động sản']
+    )
+    print(f"\nPanel shape: {panel['panel'].shape} ({panel['quarters'][0]} - {panel['quarters'][-1]})")
+    print(panel_to_frame(panel).dropna(how='all').tail(8))
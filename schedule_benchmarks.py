@@ -0,0 +1,115 @@
+#%%
+import time
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from balance_sheet_manager import (
+    generate_balance_sheet_schedules,
+    generate_balance_sheet_schedules_batch,
+    schedule_batch_to_dataframe,
+)
+
+DEFAULT_HORIZONS = (5, 10, 25, 50, 100)
+
+
+def long_horizon_project(n_years: int, start_year: int = 2025) -> Dict:
+    """
+    Synthetic township/leasehold-style project spanning `n_years`.
+
+    Construction and debt drawdown take the first third of the horizon, land is paid
+    over the first tenth, presales run through the first half and revenue is booked
+    from construction end to the last year, with a step interest-rate curve.
+
+    Args:
+        n_years: Project horizon in years
+        start_year: First project year
+
+    Returns:
+        Keyword arguments for generate_balance_sheet_schedules
+    """
+    end_year = start_year + n_years - 1
+    construction_end_year = start_year + max(1, n_years // 3)
+    return dict(
+        total_debt=1000000000 * n_years / 5,
+        total_construction_cost=800000000 * n_years / 5,
+        total_land_cost=300000000 * n_years / 5,
+        land_payment_start_year=start_year,
+        land_payment_years=max(1, n_years // 10),
+        presales_schedule={
+            year: 100000000 * (1 + (year - start_year) % 4)
+            for year in range(start_year + 1, start_year + max(2, n_years // 2))
+        },
+        interest_rate={start_year: 0.09, start_year + n_years // 2: 0.075},
+        sga_percentage=0.05,
+        debt_disbursement_start_year=start_year,
+        debt_disbursement_end_year=construction_end_year,
+        debt_repayment_start_year=construction_end_year + 1,
+        debt_repayment_end_year=end_year,
+        revenue_booking_start_year=construction_end_year,
+        revenue_booking_end_year=end_year,
+    )
+
+
+def _time_call(func, kwargs: Dict, repeats: int) -> float:
+    """Best-of-three mean seconds per call."""
+    best = np.inf
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            func(**kwargs)
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best
+
+
+def benchmark_schedule_scaling(
+    horizons: Sequence[int] = DEFAULT_HORIZONS,
+    repeats: int = 20
+) -> pd.DataFrame:
+    """
+    Time generate_balance_sheet_schedules across project horizons and check it against
+    the batched engine.
+
+    Cost per projected year should stay roughly flat as the horizon grows (linear
+    total cost); a quadratic build shows up as per-year cost rising with the horizon.
+
+    Args:
+        horizons: Project lengths in years
+        repeats: Calls per timing sample
+
+    Returns:
+        DataFrame with horizon, ms per schedule, µs per projected year, batched engine
+        ms per schedule and the largest absolute difference between the two engines
+    """
+    rows = []
+    for n_years in horizons:
+        kwargs = long_horizon_project(n_years)
+        scalar = generate_balance_sheet_schedules(**kwargs)
+        batch = schedule_batch_to_dataframe(generate_balance_sheet_schedules_batch(**kwargs))
+        columns = scalar.columns[1:]
+        max_diff = float(np.max(np.abs(
+            scalar[columns].to_numpy(dtype=float) - batch[columns].to_numpy(dtype=float)
+        )))
+
+        seconds = _time_call(generate_balance_sheet_schedules, kwargs, repeats)
+        batch_seconds = _time_call(generate_balance_sheet_schedules_batch, kwargs, repeats)
+        rows.append({
+            'horizon': n_years,
+            'scalar_ms': seconds * 1e3,
+            'us_per_year': seconds * 1e6 / n_years,
+            'batch_ms': batch_seconds * 1e3,
+            'max_abs_diff': max_diff,
+        })
+    return pd.DataFrame(rows)
+
+
+# Example usage
+if __name__ == "__main__":
+    results = benchmark_schedule_scaling()
+    print(results.to_string(index=False, float_format='{:,.3f}'.format))
+
+    first, last = results.iloc[0], results.iloc[-1]
+    print(f"\n{int(last['horizon'])}y vs {int(first['horizon'])}y: "
+          f"{last['scalar_ms'] / first['scalar_ms']:.1f}x time for "
+          f"{last['horizon'] / first['horizon']:.0f}x the years")
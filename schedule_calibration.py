@@ -0,0 +1,263 @@
+#%%
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from balance_sheet_manager import _timeline_from_kwargs, generate_balance_sheet_schedules_batch
+
+# Schedule columns that can be matched against reported figures
+CALIBRATION_TARGETS = ('Inventory_Balance', 'Customer_Prepayment_Balance', 'Debt_Balance', 'PAT')
+
+# Search ranges for the fitted assumptions
+DEFAULT_PARAMETER_BOUNDS = {
+    'interest_rate': (0.0, 0.20),
+    'sga_percentage': (0.0, 0.15),
+    'first_tranche_percentage': (0.0, 1.0),  # Share of presales collected in the presale year
+    'revenue_front_loading': (0.25, 4.0),  # Ratio between successive revenue-booking years
+}
+
+# VAS line item codes (mã số) for each target in the consolidated statements
+VAS_TARGET_CODES = {
+    'Inventory_Balance': ('balance_sheet', ['140']),  # Hàng tồn kho
+    'Customer_Prepayment_Balance': ('balance_sheet', ['312', '332']),  # Người mua trả tiền trước ngắn/dài hạn
+    'Debt_Balance': ('balance_sheet', ['320', '338']),  # Vay và nợ thuê tài chính ngắn/dài hạn
+    'PAT': ('income_statement', ['60']),  # Lợi nhuận sau thuế TNDN
+}
+
+
+def front_loaded_revenue_distribution(
+    project_start_year: int,
+    project_end_year: int,
+    revenue_booking_start_year: int,
+    revenue_booking_end_year: int,
+    front_loading: np.ndarray
+) -> np.ndarray:
+    """
+    Geometric revenue-booking pattern over the booking window.
+
+    Each booking year gets `front_loading` times the weight of the following year,
+    so 1.0 is the default linear pattern, > 1 books earlier and < 1 books later.
+
+    Args:
+        project_start_year: First year of the project timeline
+        project_end_year: Last year of the project timeline
+        revenue_booking_start_year: Year revenue recognition begins
+        revenue_booking_end_year: Year revenue recognition ends
+        front_loading: Candidate ratios, shape (B,)
+
+    Returns:
+        Array (B, n_years) of decimals summing to 1 over the booking window
+    """
+    years = np.arange(project_start_year, project_end_year + 1)
+    window = (years >= revenue_booking_start_year) & (years <= revenue_booking_end_year)
+    offsets = np.where(window, years - revenue_booking_start_year, 0)
+
+    ratio = np.asarray(front_loading, dtype=float)[:, np.newaxis]
+    weights = np.where(window, ratio ** -offsets, 0.0)
+    totals = weights.sum(axis=1, keepdims=True)
+    return np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+
+def _project_years(project: Dict) -> np.ndarray:
+    """Timeline years the schedule engine will use for a project."""
+    project_start_year, project_end_year, _, _ = _timeline_from_kwargs(project)
+    return np.arange(project_start_year, project_end_year + 1)
+
+
+def _evaluate_candidates(
+    project: Dict,
+    years: np.ndarray,
+    candidates: Dict[str, np.ndarray],
+    targets: Dict[int, Dict[str, float]],
+    target_weights: Dict[str, float]
+) -> Tuple[np.ndarray, Dict[Tuple[int, str], np.ndarray]]:
+    """Run the batched engine once for all candidates and score them against targets."""
+    revenue_distribution = front_loaded_revenue_distribution(
+        int(years[0]), int(years[-1]),
+        project['revenue_booking_start_year'], project['revenue_booking_end_year'],
+        candidates['revenue_front_loading']
+    )
+    batch = generate_balance_sheet_schedules_batch(
+        **{
+            **project,
+            'interest_rate': candidates['interest_rate'][:, np.newaxis],  # (B, 1) flat-rate candidates
+            'sga_percentage': candidates['sga_percentage'],
+            'first_tranche_percentage': candidates['first_tranche_percentage'],
+            'revenue_distribution': revenue_distribution,
+            'project_start_year': int(years[0]),
+            'project_end_year': int(years[-1]),
+        }
+    )
+
+    n_candidates = len(candidates['interest_rate'])
+    loss = np.zeros(n_candidates)
+    fitted = {}
+    for year, year_targets in targets.items():
+        if not years[0] <= year <= years[-1]:
+            raise ValueError(f"Target year {year} is outside the project timeline {years[0]}-{years[-1]}")
+        idx = int(year - years[0])
+        for column, target in year_targets.items():
+            model = batch[column][:, idx]
+            fitted[(year, column)] = model
+            # Relative squared error, so figures of different magnitude weigh equally
+            scale = max(abs(target), 1.0)
+            loss += target_weights.get(column, 1.0) * ((model - target) / scale) ** 2
+
+    return loss, fitted
+
+
+def calibrate_schedule_parameters(
+    project: Dict,
+    targets: Dict[int, Dict[str, float]],
+    bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+    target_weights: Optional[Dict[str, float]] = None,
+    n_candidates: int = 4096,
+    n_iterations: int = 15,
+    shrink: float = 0.6,
+    seed: Optional[int] = 0
+) -> Dict:
+    """
+    Fit interest rate, SG&A, collection curve and revenue-booking pattern to reported figures.
+
+    Runs a batched least-squares search: every iteration samples `n_candidates`
+    parameter sets, evaluates them in a single call to
+    generate_balance_sheet_schedules_batch and narrows the search box around the
+    best candidate so far.
+
+    Args:
+        project: Structural keyword arguments for generate_balance_sheet_schedules
+            (total_debt, total_construction_cost, total_land_cost, presales_schedule,
+            year windows, tax_rate, ...)
+        targets: Reported figures {year: {column: value}} for columns in CALIBRATION_TARGETS
+        bounds: Search ranges overriding DEFAULT_PARAMETER_BOUNDS; a parameter with
+            equal lower and upper bounds is held fixed
+        target_weights: Optional {column: weight} in the loss (default 1.0)
+        n_candidates: Parameter sets evaluated per iteration
+        n_iterations: Number of search iterations
+        shrink: Factor applied to the search box width after each iteration
+        seed: Random seed for reproducible searches
+
+    Returns:
+        Dict with:
+        - parameters: Best {parameter: value}
+        - loss: Weighted sum of squared relative errors at the best parameters
+        - fitted: DataFrame of target vs. model value per (year, column)
+        - history: Best loss after each iteration
+    """
+    for year_targets in targets.values():
+        unknown = set(year_targets) - set(CALIBRATION_TARGETS)
+        if unknown:
+            raise ValueError(f"Unsupported calibration targets: {sorted(unknown)}")
+
+    bounds = {**DEFAULT_PARAMETER_BOUNDS, **(bounds or {})}
+    target_weights = target_weights or {}
+    years = _project_years(project)
+    rng = np.random.default_rng(seed)
+
+    names = list(DEFAULT_PARAMETER_BOUNDS)
+    lower = np.array([bounds[name][0] for name in names], dtype=float)
+    upper = np.array([bounds[name][1] for name in names], dtype=float)
+
+    best_point = None
+    best_loss = np.inf
+    history = []
+    half_width = (upper - lower) / 2
+
+    for iteration in range(n_iterations):
+        if best_point is None:
+            points = rng.uniform(lower, upper, size=(n_candidates, len(names)))
+        else:
+            low = np.maximum(lower, best_point - half_width)
+            high = np.minimum(upper, best_point + half_width)
+            points = rng.uniform(low, high, size=(n_candidates, len(names)))
+            # Keep the incumbent so the best loss never gets worse
+            points[0] = best_point
+
+        candidates = {name: points[:, j] for j, name in enumerate(names)}
+        loss, _ = _evaluate_candidates(project, years, candidates, targets, target_weights)
+
+        winner = int(np.argmin(loss))
+        if loss[winner] < best_loss:
+            best_loss = float(loss[winner])
+            best_point = points[winner].copy()
+        history.append(best_loss)
+        half_width = half_width * shrink
+
+    best_candidates = {name: np.array([best_point[j]]) for j, name in enumerate(names)}
+    _, fitted = _evaluate_candidates(project, years, best_candidates, targets, target_weights)
+    fitted_rows = [
+        {'Year': year, 'Column': column, 'Target': targets[year][column], 'Model': float(model[0])}
+        for (year, column), model in fitted.items()
+    ]
+
+    return {
+        'parameters': {name: float(best_point[j]) for j, name in enumerate(names)},
+        'loss': best_loss,
+        'fitted': pd.DataFrame(fitted_rows),
+        'history': history,
+    }
+
+
+def reported_targets_from_statements(
+    statements: pd.DataFrame,
+    year: int,
+    period: str = 'current',
+    scale: float = 1.0,
+    aligned_only: bool = True
+) -> Dict[int, Dict[str, float]]:
+    """
+    Build calibration targets from parse_financial_statements output.
+
+    Args:
+        statements: Line-item table from financial_statement_parser.parse_financial_statements
+        year: Model year the reported figures correspond to
+        period: 'current' or 'prior' amount column
+        scale: Divisor converting reported VND to model units (e.g. 1e9 for VND bn)
+        aligned_only: Skip column-layout rows whose OCR alignment is uncertain
+
+    Returns:
+        {year: {column: value}} with the targets that could be found
+    """
+    rows = statements[statements['aligned']] if aligned_only else statements
+    found = {}
+    for column, (section, codes) in VAS_TARGET_CODES.items():
+        items = rows[(rows['section'] == section) & rows['code'].isin(codes)]
+        amounts = items.drop_duplicates('code')[period].dropna()
+        if len(amounts):
+            found[column] = float(amounts.sum()) / scale
+    return {year: found} if found else {}
+
+
+# Example usage
+if __name__ == "__main__":
+    from balance_sheet_manager import schedule_batch_to_dataframe
+
+    project = dict(
+        total_debt=1000000000,
+        total_construction_cost=800000000,
+        total_land_cost=300000000,
+        land_payment_year=2024,
+        presales_schedule={2025: 450000000, 2026: 750000000, 2027: 300000000},
+        debt_disbursement_start_year=2024,
+        debt_disbursement_end_year=2026,
+        debt_repayment_start_year=2027,
+        debt_repayment_end_year=2029,
+        revenue_booking_start_year=2027,
+        revenue_booking_end_year=2029,
+    )
+
+    # Synthetic "reported" figures from known assumptions
+    truth = schedule_batch_to_dataframe(generate_balance_sheet_schedules_batch(
+        **project, interest_rate=0.095, sga_percentage=0.04, first_tranche_percentage=0.2,
+        revenue_distribution=front_loaded_revenue_distribution(2024, 2029, 2027, 2029, np.array([1.5]))
+    )).set_index('Year')
+    targets = {
+        year: {column: float(truth.loc[year, column]) for column in CALIBRATION_TARGETS}
+        for year in (2026, 2027, 2028)
+    }
+
+    result = calibrate_schedule_parameters(project, targets)
+    print("Calibrated parameters:", {k: round(v, 4) for k, v in result['parameters'].items()})
+    print(f"Loss: {result['loss']:.3e}")
+    print(result['fitted'].to_string(index=False))
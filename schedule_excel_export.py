@@ -0,0 +1,291 @@
+#%%
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name, xl_rowcol_to_cell
+
+# Columns produced by generate_balance_sheet_schedules, in output order
+SCHEDULE_COLUMNS = [
+    'Debt_Balance', 'Land_Cost', 'Construction_Cost', 'Interest_Capitalized',
+    'Inventory_Addition', 'Inventory_Balance', 'Presales', 'Customer_Prepayment_Balance',
+    'Revenue_Recognition', 'COGS', 'SGA_Expense', 'Interest_Expense_Cash', 'PBT', 'Tax', 'PAT',
+    'Cash_Inflow_Presales', 'Debt_Disbursement', 'Debt_Repayment', 'Cash_Outflow_Land',
+    'Cash_Outflow_Construction', 'Cash_Outflow_Interest', 'Cash_Outflow_SGA', 'Cash_Outflow_Tax',
+    'Cash_Balance_Change', 'Cumulative_Cash_Balance'
+]
+
+# Stock columns: the "Total" row shows the final balance instead of a sum
+BALANCE_COLUMNS = {
+    'Debt_Balance', 'Inventory_Balance', 'Customer_Prepayment_Balance', 'Cumulative_Cash_Balance'
+}
+
+CONSOLIDATED_SHEET = 'Consolidated'
+INVALID_SHEET_CHARS_RE = re.compile(r'[\[\]:*?/\\]')
+MAX_SHEET_NAME_LENGTH = 31
+
+Schedule = Union[pd.DataFrame, Mapping[str, np.ndarray]]
+
+
+def _build_formats(workbook: xlsxwriter.Workbook) -> Dict[str, object]:
+    """Create every cell format once; xlsxwriter formats are shared objects."""
+    return {
+        'header': workbook.add_format({
+            'bold': True, 'bg_color': '#1F4E78', 'font_color': '#FFFFFF',
+            'border': 1, 'align': 'center', 'valign': 'vcenter', 'text_wrap': True
+        }),
+        'year': workbook.add_format({'num_format': '0', 'align': 'center'}),
+        'number': workbook.add_format({'num_format': '#,##0;(#,##0);"-"'}),
+        'total_label': workbook.add_format({'bold': True, 'top': 1, 'bottom': 6}),
+        'total_number': workbook.add_format({
+            'bold': True, 'num_format': '#,##0;(#,##0);"-"', 'top': 1, 'bottom': 6
+        }),
+    }
+
+
+def _unique_sheet_name(name: str, used: set) -> str:
+    """Sanitise a sheet name to Excel's rules and make it unique within the workbook."""
+    base = INVALID_SHEET_CHARS_RE.sub('_', str(name)).strip() or 'Sheet'
+    base = base[:MAX_SHEET_NAME_LENGTH]
+    candidate = base
+    suffix = 2
+    while candidate.lower() in used:
+        tag = f" ({suffix})"
+        candidate = f"{base[:MAX_SHEET_NAME_LENGTH - len(tag)]}{tag}"
+        suffix += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def _schedule_arrays(schedule: Schedule, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extract year and value arrays from a schedule, dropping any 'Total' row.
+
+    Returns:
+        Tuple of (years as int array, values as float array of shape (n_years, n_columns))
+    """
+    years = np.asarray(schedule['Year'])
+    if years.dtype == object:
+        year_rows = np.array([not isinstance(y, str) for y in years])
+    else:
+        year_rows = np.ones(len(years), dtype=bool)
+
+    values = np.empty((int(year_rows.sum()), len(columns)), dtype=np.float64)
+    for j, column in enumerate(columns):
+        values[:, j] = np.asarray(schedule[column], dtype=object)[year_rows].astype(np.float64)
+    return years[year_rows].astype(np.int64), values
+
+
+def _write_header(worksheet, columns: List[str], formats: Dict[str, object]) -> None:
+    worksheet.write_row(0, 0, ['Year'] + [c.replace('_', ' ') for c in columns], formats['header'])
+    worksheet.set_row(0, 30)
+    worksheet.set_column(0, 0, 8)
+    worksheet.set_column(1, len(columns), 16)
+    worksheet.freeze_panes(1, 1)
+
+
+def _write_total_row(
+    worksheet,
+    row: int,
+    n_years: int,
+    columns: List[str],
+    totals: np.ndarray,
+    formats: Dict[str, object]
+) -> None:
+    """
+    Write the 'Total' row as formulas over the year rows above it.
+
+    Flow columns sum the years; balance columns reference the final year. The
+    computed totals are stored as cached results so viewers that do not
+    recalculate still show the right figures.
+    """
+    worksheet.write_string(row, 0, 'Total', formats['total_label'])
+    first_row, last_row = 1, row - 1
+    for j, column in enumerate(columns):
+        col = j + 1
+        if n_years == 0:
+            worksheet.write_number(row, col, 0, formats['total_number'])
+            continue
+        if column in BALANCE_COLUMNS:
+            formula = f"={xl_rowcol_to_cell(last_row, col)}"
+        else:
+            col_name = xl_col_to_name(col)
+            formula = f"=SUM({col_name}{first_row + 1}:{col_name}{last_row + 1})"
+        worksheet.write_formula(row, col, formula, formats['total_number'], totals[j])
+
+
+def _write_schedule_sheet(
+    worksheet,
+    years: np.ndarray,
+    values: np.ndarray,
+    columns: List[str],
+    formats: Dict[str, object]
+) -> None:
+    """Stream one schedule into a worksheet row by row, then add the Total row."""
+    _write_header(worksheet, columns, formats)
+    for i in range(len(years)):
+        worksheet.write_number(i + 1, 0, int(years[i]), formats['year'])
+        worksheet.write_row(i + 1, 1, values[i].tolist(), formats['number'])
+
+    totals = values.sum(axis=0) if len(years) else np.zeros(len(columns))
+    for j, column in enumerate(columns):
+        if column in BALANCE_COLUMNS and len(years):
+            totals[j] = values[-1, j]
+    _write_total_row(worksheet, len(years) + 1, len(years), columns, totals, formats)
+
+
+def _release_sheet_file(worksheet) -> None:
+    """
+    Close a finished sheet's constant-memory temp file.
+
+    xlsxwriter keeps one open temp file per worksheet until workbook.close(), so a
+    workbook with more sheets than the open-file limit fails. The last row stays
+    buffered on the worksheet; xlsxwriter reopens the file and flushes it when the
+    workbook is assembled.
+    """
+    worksheet._opt_close()
+
+
+def export_schedules_to_excel(
+    output_path: str,
+    schedules: Iterable[Tuple[str, Schedule]],
+    columns: Optional[List[str]] = None,
+    consolidated: bool = True
+) -> str:
+    """
+    Stream project/scenario schedules into an Excel workbook in constant-memory mode.
+
+    Each schedule is written to its own sheet as soon as it is produced, so
+    `schedules` can be a generator that builds one project at a time. Only a
+    per-year running sum is kept for the consolidated sheet, so memory does not
+    grow with the number of projects, and each sheet's temp file is closed once it
+    is written, so open files do not either. Balance columns are accumulated as year-on-year
+    changes, so a project that has ended keeps contributing its final balance to
+    every later consolidated year.
+
+    Args:
+        output_path: Destination .xlsx file
+        schedules: Iterable of (sheet_name, schedule) where schedule is the DataFrame
+            returned by generate_balance_sheet_schedules or a dict of column arrays
+            including 'Year'
+        columns: Schedule columns to export (defaults to SCHEDULE_COLUMNS)
+        consolidated: Add a first sheet summing all schedules by year
+
+    Returns:
+        The output path
+    """
+    columns = list(columns or SCHEDULE_COLUMNS)
+    balance_mask = np.array([column in BALANCE_COLUMNS for column in columns], dtype=bool)
+    workbook = xlsxwriter.Workbook(output_path, {'constant_memory': True})
+    try:
+        formats = _build_formats(workbook)
+        used_names = set()
+
+        # Created first so it is the first tab; filled in once all projects are streamed
+        consolidated_sheet = None
+        if consolidated:
+            consolidated_sheet = workbook.add_worksheet(_unique_sheet_name(CONSOLIDATED_SHEET, used_names))
+            _release_sheet_file(consolidated_sheet)
+        consolidated_totals: Dict[int, np.ndarray] = {}
+
+        for name, schedule in schedules:
+            years, values = _schedule_arrays(schedule, columns)
+            worksheet = workbook.add_worksheet(_unique_sheet_name(name, used_names))
+            _write_schedule_sheet(worksheet, years, values, columns, formats)
+            _release_sheet_file(worksheet)
+
+            if consolidated:
+                # Flows add up by year; balances are summed as changes and cumulated below
+                changes = values.copy()
+                changes[1:, balance_mask] = np.diff(values[:, balance_mask], axis=0)
+                for i, year in enumerate(years.tolist()):
+                    if year in consolidated_totals:
+                        consolidated_totals[year] += changes[i]
+                    else:
+                        consolidated_totals[year] = changes[i].copy()
+
+        if consolidated_sheet is not None:
+            consolidated_years = np.array(sorted(consolidated_totals), dtype=np.int64)
+            consolidated_values = (
+                np.vstack([consolidated_totals[y] for y in consolidated_years])
+                if len(consolidated_years) else np.zeros((0, len(columns)))
+            )
+            consolidated_values[:, balance_mask] = np.cumsum(consolidated_values[:, balance_mask], axis=0)
+            consolidated_sheet._opt_reopen()
+            _write_schedule_sheet(consolidated_sheet, consolidated_years, consolidated_values, columns, formats)
+    finally:
+        workbook.close()
+
+    return output_path
+
+
+def check_sheets_beyond_file_limit(fd_limit: int = 256, extra_sheets: int = 100) -> Dict[str, int]:
+    """
+    Export more project sheets than the open-file limit allows descriptors.
+
+    Lowers the soft RLIMIT_NOFILE (256 is the macOS default) for the duration of the
+    export and restores it afterwards. Unix only.
+
+    Args:
+        fd_limit: Soft open-file limit to run under
+        extra_sheets: Sheets to write beyond fd_limit
+
+    Returns:
+        Dict with the fd limit used, sheets written and sheets found in the workbook
+    """
+    import resource
+    import zipfile
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    limit = min(fd_limit, soft)
+    n_sheets = limit + extra_sheets
+    years = np.arange(2024, 2029)
+    schedule = {'Year': years, **{column: np.arange(1.0, len(years) + 1) for column in SCHEDULE_COLUMNS}}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'fd_check.xlsx')
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+        try:
+            export_schedules_to_excel(path, ((f"Project {k + 1}", schedule) for k in range(n_sheets)))
+        finally:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        with zipfile.ZipFile(path) as archive:
+            sheets = sum(name.startswith('xl/worksheets/sheet') for name in archive.namelist())
+
+    return {'fd_limit': limit, 'sheets_written': n_sheets + 1, 'sheets_in_workbook': sheets}
+
+
+# Example usage
+if __name__ == "__main__":
+    from balance_sheet_manager import generate_simplified_balance_sheet_schedules
+
+    def example_projects(n_projects: int):
+        """Build schedules lazily so only one project is in memory at a time."""
+        for k in range(n_projects):
+            yield f"Project {k + 1}", generate_simplified_balance_sheet_schedules(
+                total_debt=1000000000 * (1 + k % 3),
+                total_construction_cost=800000000,
+                total_land_cost=300000000,
+                land_payment_year=2024,
+                total_revenue=1500000000,
+                interest_rate=0.08,
+                sga_percentage=0.05,
+                construction_start_year=2024,
+                construction_end_year=2026,
+                sales_start_year=2025,
+                sales_end_year=2027,
+                debt_repayment_start_year=2027,
+                debt_repayment_end_year=2028,
+                revenue_booking_start_year=2027,
+                revenue_booking_end_year=2028,
+                presales_distribution={'2025': 30, '2026': 50, '2027': 20}
+            )
+
+    path = export_schedules_to_excel('portfolio_schedules.xlsx', example_projects(20))
+    print(f"Workbook written to {path}")
+
+    print(check_sheets_beyond_file_limit())